@@ -1,7 +1,10 @@
 # articles/admin.py
 from django.contrib import admin
+from django.db.models import Q
 
-from .models import Report
+from .certificate_export import certificates_zip_response
+from .fulltext import matching_ids
+from .models import AnalysisJob, Report
 
 
 @admin.register(Report)
@@ -9,3 +12,27 @@ class ReportAdmin(admin.ModelAdmin):
     list_display = ["title", "author", "created_at", "status"]
     search_fields = ["title", "author__email"]
     list_filter = ["status", "created_at"]
+    actions = ["export_certificates"]
+
+    def get_search_results(self, request, queryset, search_term):
+        # Полнотекстовый индекс вместо ILIKE '%...%' по названию;
+        # точный email автора ищется по индексу пользователей
+        if not search_term.strip():
+            return queryset, False
+        queryset = queryset.filter(
+            Q(pk__in=matching_ids(search_term))
+            | Q(author__email__iexact=search_term.strip())
+        )
+        return queryset, False
+
+    @admin.action(description="Скачать справки (ZIP)")
+    def export_certificates(self, request, queryset):
+        return certificates_zip_response(queryset)
+
+
+@admin.register(AnalysisJob)
+class AnalysisJobAdmin(admin.ModelAdmin):
+    list_display = ["report", "status", "progress", "created_at",
+                    "finished_at"]
+    list_filter = ["status", "created_at"]
+    readonly_fields = ["stats"]
@@ -1,26 +1,227 @@
 # articles/ai_detection.py
-import torch
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
+import logging
+import threading
+
+from django.conf import settings
+
+from .inference_server import InferenceServer
+
+logger = logging.getLogger(__name__)
 
-# Загружаем модель один раз при старте
 MODEL_NAME = "roberta-base"
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+MAX_LENGTH = 512  # предел позиций RoBERTa, включая служебные токены
+AGGREGATION_METHODS = ("mean", "weighted", "max")
+# fp32 — исходная модель; int8 — динамическая int8-квантизация
+# линейных слоёв (только CPU, меньше памяти и быстрее на x86/ARM)
+MODEL_MODES = ("fp32", "int8")
 
 
-def detect_ai(text: str) -> float:
+class ModelHolder:
     """
-    Использует RoBERTa для определения вероятности AI-генерации текста.
-    Возвращает число от 0 до 100.
+    Лениво загружает токенизатор и модель при первом обращении.
+    Загрузка выполняется один раз, даже если её запросили
+    несколько потоков одновременно.
+    """
+
+    def __init__(self, model_name, mode=None):
+        self.model_name = model_name
+        self.mode = mode  # None — берётся из settings.AI_MODEL_MODE
+        self._lock = threading.Lock()
+        self._tokenizer = None
+        self._model = None
+
+    @property
+    def ready(self):
+        return self._model is not None
+
+    def load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    logger.info(f"[AI] Загрузка модели {self.model_name}...")
+                    # torch и transformers импортируются только здесь:
+                    # веб-процессы и миграции модель не загружают
+                    import torch
+                    from transformers import (
+                        AutoModelForSequenceClassification, AutoTokenizer,
+                    )
+
+                    if settings.AI_TORCH_THREADS > 0:
+                        torch.set_num_threads(settings.AI_TORCH_THREADS)
+                    tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                    model = AutoModelForSequenceClassification.from_pretrained(
+                        self.model_name
+                    )
+                    model.eval()
+                    mode = self.mode or settings.AI_MODEL_MODE
+                    if mode not in MODEL_MODES:
+                        raise ValueError(f"Неизвестный режим модели: {mode}")
+                    if mode == "int8":
+                        model = torch.ao.quantization.quantize_dynamic(
+                            model, {torch.nn.Linear}, dtype=torch.qint8
+                        )
+                    self.mode = mode
+                    self._tokenizer = tokenizer
+                    self._model = model
+                    logger.info(f"[AI] Модель {self.model_name} "
+                                f"загружена ({mode}).")
+        return self._tokenizer, self._model
+
+
+_holder = ModelHolder(MODEL_NAME)
+
+
+def get_model():
+    """
+    Возвращает (tokenizer, model), загружая их при первом вызове.
+    """
+    return _holder.load()
+
+
+def warmup():
+    """
+    Заранее загружает модель, чтобы первый запрос не ждал загрузки.
+    """
+    get_model()
+
+
+def is_ready():
+    return _holder.ready
+
+
+def encode_windows(tokenizer, text):
+    """
+    Режет текст на перекрывающиеся окна по MAX_LENGTH токенов.
+    Возвращает список тензоров input_ids без паддинга.
+    """
+    encoded = tokenizer(
+        text,
+        truncation=True,
+        max_length=MAX_LENGTH,
+        stride=settings.AI_CHUNK_STRIDE,
+        return_overflowing_tokens=True,
+        padding=True,
+        return_tensors="pt",
+    )
+    return [
+        ids[: int(mask.sum())]
+        for ids, mask in zip(encoded["input_ids"], encoded["attention_mask"])
+    ]
+
+
+def forward_windows(tokenizer, model, rows):
+    """
+    Один прямой проход модели по пакету окон разной длины
+    (тензоры input_ids без паддинга). Возвращает вероятности AI-класса.
     """
-    inputs = tokenizer(text, return_tensors="pt",
-                       truncation=True, max_length=512)
+    import torch
 
-    with torch.no_grad():
-        outputs = model(**inputs)
-        logits = outputs.logits
-        probs = torch.softmax(logits, dim=1).squeeze().tolist()
+    width = max(len(row) for row in rows)
+    input_ids = torch.full((len(rows), width), tokenizer.pad_token_id,
+                           dtype=torch.long)
+    attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+    for i, row in enumerate(rows):
+        input_ids[i, : len(row)] = row
+        attention_mask[i, : len(row)] = 1
 
-    # probs[1] — вероятность того, что это AI-текст
-    ai_probability = probs[1]
-    return round(ai_probability * 100, 2)
+    with torch.inference_mode():
+        logits = model(input_ids=input_ids,
+                       attention_mask=attention_mask).logits
+    # [:, 1] — вероятность того, что это AI-текст
+    return torch.softmax(logits, dim=1)[:, 1].tolist()
+
+
+def _run_batch(rows):
+    tokenizer, model = get_model()
+    return forward_windows(tokenizer, model, rows)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_inference_server():
+    """
+    Общий для процесса сервер микропакетов: окна от одновременных
+    вызовов detect_ai объединяются в один прямой проход модели.
+    """
+    global _server
+    if _server is None:
+        with _server_lock:
+            if _server is None:
+                _server = InferenceServer(
+                    _run_batch,
+                    max_batch_size=settings.AI_BATCH_SIZE,
+                    max_wait_ms=settings.AI_SERVER_MAX_WAIT_MS,
+                    max_queue_size=settings.AI_SERVER_QUEUE_SIZE,
+                )
+    return _server
+
+
+def inference_metrics():
+    """
+    Счётчики сервера микропакетов этого процесса с момента запуска
+    или None, если процесс ещё не запускал детекцию.
+    """
+    server = _server
+    if server is None:
+        return None
+    metrics = server.metrics.as_dict()
+    metrics["queue_depth"] = server.queue_depth()
+    return metrics
+
+
+def __getattr__(name):
+    # Совместимость со старым кодом, обращавшимся к ai_detection.model
+    if name == "tokenizer":
+        return get_model()[0]
+    if name == "model":
+        return get_model()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _aggregate(scores, lengths, method):
+    if method == "max":
+        return max(scores)
+    if method == "weighted":
+        total = sum(lengths)
+        return sum(s * n for s, n in zip(scores, lengths)) / total
+    return sum(scores) / len(scores)
+
+
+def detect_ai_detailed(text: str, aggregation=None) -> dict:
+    """
+    Оценивает весь документ: текст режется на перекрывающиеся окна
+    по MAX_LENGTH токенов (перекрытие AI_CHUNK_STRIDE), окна отправляются
+    в сервер микропакетов (пакеты до AI_BATCH_SIZE окон). Оценки окон
+    сводятся методом aggregation: mean, weighted (по длине окна) или max.
+
+    Возвращает {"score": 0–100, "aggregation": ..., "chunks": [
+    {"index", "tokens", "score"}, ...]}.
+    """
+    aggregation = aggregation or settings.AI_AGGREGATION
+    if aggregation not in AGGREGATION_METHODS:
+        raise ValueError(f"Неизвестный метод агрегации: {aggregation}")
+
+    tokenizer, _ = get_model()
+    rows = encode_windows(tokenizer, text)
+    scores = get_inference_server().infer(rows)
+
+    lengths = [len(row) for row in rows]
+    chunks = [
+        {"index": i, "tokens": int(n), "score": round(p * 100, 2)}
+        for i, (p, n) in enumerate(zip(scores, lengths))
+    ]
+    return {
+        "score": round(_aggregate(scores, lengths, aggregation) * 100, 2),
+        "aggregation": aggregation,
+        "chunks": chunks,
+    }
+
+
+def detect_ai(text: str) -> float:
+    """
+    Использует RoBERTa для определения вероятности AI-генерации текста.
+    Возвращает число от 0 до 100 по всему документу (см. detect_ai_detailed).
+    """
+    return detect_ai_detailed(text)["score"]
@@ -1,41 +1,142 @@
 # articles/cache_utils.py
 import json
+import logging
 import os
+import sqlite3
 import threading
-from time import time
+from time import sleep, time
 
-CACHE_FILE = "google_search_cache.json"
-CACHE_LOCK = threading.Lock()
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_DB = str(settings.SEARCH_CACHE_DB)
 CACHE_EXPIRATION = 60 * 60 * 24  # 24 часа
+CACHE_MAX_ENTRIES = settings.SEARCH_CACHE_MAX_ENTRIES
+CACHE_PURGE_INTERVAL = 60 * 10  # фоновая очистка раз в 10 минут
 
+_local = threading.local()
+_purger_lock = threading.Lock()
+_purger_pid = None
 
-def load_cache():
-    if not os.path.exists(CACHE_FILE):
-        return {}
-    try:
-        with open(CACHE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {}
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    query TEXT PRIMARY KEY,
+    results TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS search_cache_created_at
+    ON search_cache (created_at);
+"""
 
 
-def save_cache(cache_data):
-    with CACHE_LOCK:
-        with open(CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+def get_connection():
+    """
+    Возвращает соединение с SQLite-кэшем для текущего потока.
+    WAL позволяет читать параллельно с записью из других процессов.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None or _local.pid != os.getpid():
+        # После fork соединения родителя использовать нельзя
+        connections = _local.connections = {}
+        _local.pid = os.getpid()
+
+    conn = connections.get(CACHE_DB)
+    if conn is None:
+        conn = sqlite3.connect(CACHE_DB, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        connections[CACHE_DB] = conn
+        _start_purger()
+    return conn
 
 
 def get_cached_result(query):
-    cache = load_cache()
-    record = cache.get(query)
-    if record:
-        timestamp = record.get("timestamp", 0)
-        if time() - timestamp < CACHE_EXPIRATION:
-            return record.get("results")
-    return None
-
-
-def set_cached_result(query, results):
-    cache = load_cache()
-    cache[query] = {"timestamp": time(), "results": results}
-    save_cache(cache)
+    row = get_connection().execute(
+        "SELECT results FROM search_cache "
+        "WHERE query = ? AND created_at >= ?",
+        (query, time() - CACHE_EXPIRATION),
+    ).fetchone()
+    if row is None:
+        return None
+    return json.loads(row[0])
+
+
+def set_cached_result(query, results, timestamp=None):
+    get_connection().execute(
+        "INSERT INTO search_cache (query, results, created_at) "
+        "VALUES (?, ?, ?) "
+        "ON CONFLICT(query) DO UPDATE SET "
+        "results = excluded.results, created_at = excluded.created_at",
+        (query, json.dumps(results, ensure_ascii=False),
+         time() if timestamp is None else timestamp),
+    )
+
+
+def purge_cache():
+    """
+    Удаляет просроченные записи и самые старые записи сверх
+    CACHE_MAX_ENTRIES. Возвращает количество удалённых строк.
+    """
+    conn = get_connection()
+    expired = conn.execute(
+        "DELETE FROM search_cache WHERE created_at < ?",
+        (time() - CACHE_EXPIRATION,),
+    ).rowcount
+    evicted = conn.execute(
+        "DELETE FROM search_cache WHERE query IN ("
+        "SELECT query FROM search_cache "
+        "ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+        (CACHE_MAX_ENTRIES,),
+    ).rowcount
+    return expired + evicted
+
+
+def _purge_loop():
+    while True:
+        try:
+            removed = purge_cache()
+            if removed:
+                logger.info(f"[Cache] Удалено записей: {removed}")
+        except sqlite3.Error as e:
+            logger.error(f"[Cache] Ошибка очистки кэша: {e}")
+        sleep(CACHE_PURGE_INTERVAL)
+
+
+def _start_purger():
+    global _purger_pid
+    with _purger_lock:
+        if _purger_pid == os.getpid():
+            return
+        _purger_pid = os.getpid()
+    threading.Thread(target=_purge_loop, name="search-cache-purger",
+                     daemon=True).start()
+
+
+def import_json_cache(json_path):
+    """
+    Импортирует старый JSON-кэш (google_search_cache.json) в SQLite,
+    сохраняя исходные метки времени. Возвращает число импортированных записей.
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    conn = get_connection()
+    rows = [
+        (query, json.dumps(record.get("results", []), ensure_ascii=False),
+         record.get("timestamp", 0))
+        for query, record in data.items()
+        if isinstance(record, dict)
+    ]
+    with conn:
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO search_cache (query, results, created_at) "
+            "VALUES (?, ?, ?) "
+            "ON CONFLICT(query) DO UPDATE SET "
+            "results = excluded.results, created_at = excluded.created_at "
+            "WHERE excluded.created_at > search_cache.created_at",
+            rows,
+        )
+    return len(rows)
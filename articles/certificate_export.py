@@ -0,0 +1,147 @@
+# articles/certificate_export.py
+"""
+Потоковая выгрузка справок архивом ZIP.
+
+Архив пишется в ответ по мере готовности справок: ZipFile работает
+с приёмником без seek (размеры записей уходят в data descriptor),
+поэтому ни архив, ни список справок целиком в памяти не держатся.
+Устаревшие справки рендерятся в пуле из CERTIFICATE_EXPORT_WORKERS
+процессов: рендеринг reportlab — чистый Python и в потоках упирается
+в GIL. Дочерние процессы (spawn, без Django) получают готовые строки
+справки и возвращают PDF в байтах; пул создаётся только при первой
+устаревшей справке. В работе одновременно не больше
+2 × CERTIFICATE_EXPORT_WORKERS справок. БД, хранилище и запись архива
+остаются в процессе, отдающем ответ.
+"""
+import logging
+import multiprocessing
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from .certificate_render import render_certificate
+from .use_cases import (certificate_font_path, certificate_is_current,
+                        certificate_lines, certificate_version,
+                        store_certificate)
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _ZipStream:
+    """
+    Приёмник для ZipFile: накапливает записанные байты до drain().
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _entry_name(report):
+    return f"certificate_report_{report.pk}.pdf"
+
+
+def _write_entry(archive, stream, name, chunks):
+    with archive.open(name, "w") as entry:
+        for chunk in chunks:
+            entry.write(chunk)
+            data = stream.drain()
+            if data:
+                yield data
+    yield stream.drain()
+
+
+def _stored_chunks(certificate):
+    with certificate.open("rb") as f:
+        yield from f.chunks(CHUNK_SIZE)
+
+
+def stream_certificates_zip(reports, workers=None):
+    """
+    Генератор байтов ZIP-архива со справками докладов reports
+    (итерируемое, автор должен быть подгружен). Справки, которые
+    не удалось подготовить, перечисляются в errors.txt.
+    """
+    workers = workers or settings.CERTIFICATE_EXPORT_WORKERS
+    stream = _ZipStream()
+    archive = zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_STORED)
+    executor = None
+    font_path = certificate_font_path()
+    pending = {}  # future -> (доклад, версия)
+    errors = []
+    reports = iter(reports)
+    exhausted = False
+    try:
+        while pending or not exhausted:
+            while not exhausted and len(pending) < 2 * workers:
+                report = next(reports, None)
+                if report is None:
+                    exhausted = True
+                    break
+                version = certificate_version(report)
+                if certificate_is_current(report, version):
+                    yield from _write_entry(
+                        archive, stream, _entry_name(report),
+                        _stored_chunks(report.certificate),
+                    )
+                else:
+                    if executor is None:
+                        # spawn: fork процесса веб-сервера с потоками
+                        # небезопасен
+                        executor = ProcessPoolExecutor(
+                            max_workers=max(1, workers),
+                            mp_context=multiprocessing.get_context("spawn"),
+                        )
+                    future = executor.submit(render_certificate,
+                                             certificate_lines(report),
+                                             font_path)
+                    pending[future] = (report, version)
+            if not pending:
+                continue
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                report, version = pending.pop(future)
+                try:
+                    data = future.result()
+                    store_certificate(report, version, data)
+                except Exception as e:
+                    logger.exception(f"[Export] Справка доклада "
+                                     f"#{report.pk} не создана")
+                    errors.append(f"{report.pk}\t{report.title}\t{e}")
+                    continue
+                yield from _write_entry(archive, stream,
+                                        _entry_name(report), [data])
+
+        if errors:
+            archive.writestr("errors.txt", "\n".join(errors) + "\n")
+        archive.close()
+        yield stream.drain()
+    finally:
+        # Клиент мог оборвать загрузку — недоделанные справки не нужны
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def certificates_zip_response(queryset, filename="certificates.zip"):
+    reports = (queryset.select_related("author").order_by("pk")
+               .iterator(chunk_size=100))
+    response = StreamingHttpResponse(stream_certificates_zip(reports),
+                                     content_type="application/zip")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
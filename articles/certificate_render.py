@@ -0,0 +1,40 @@
+# articles/certificate_render.py
+"""
+Рендеринг PDF-справки средствами reportlab, без Django.
+
+Модуль импортируют дочерние процессы выгрузки справок
+(articles.certificate_export), в которых Django не настроен, поэтому
+данные доклада передаются сюда готовыми строками.
+"""
+import io
+from functools import lru_cache
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+FONT_NAME = "DejaVu"
+
+
+@lru_cache(maxsize=None)
+def register_fonts(font_path):
+    # Разбор TTF-файла дорогой — шрифт регистрируется один раз на процесс
+    pdfmetrics.registerFont(TTFont(FONT_NAME, font_path))
+
+
+def render_certificate(lines, font_path):
+    """
+    PDF-справка (bytes): заголовок и строки lines.
+    """
+    register_fonts(font_path)
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer)
+    p.setFont(FONT_NAME, 14)
+
+    p.drawString(100, 800, "Справка по докладу")
+    for i, line in enumerate(lines):
+        p.drawString(100, 760 - 20 * i, line)
+
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
@@ -1,20 +1,126 @@
 import logging
+import threading
 from functools import wraps
+from time import time
 
 from .cache_utils import get_cached_result, set_cached_result
 
 logger = logging.getLogger(__name__)  # добавили это
 
+NEGATIVE_CACHE_TTL = 60  # сек., сколько помнить неудачный запрос
+
+
+class SearchError(Exception):
+    """
+    Временная ошибка внешнего поиска (429, сетевая ошибка и т.п.).
+    В отличие от пустого списка результатов, не кэшируется надолго.
+    """
+
+
+class CacheStats:
+    FIELDS = ("hits", "misses", "coalesced", "errors", "negative_hits")
+
+    def __init__(self, fields=None):
+        self.fields = tuple(fields or self.FIELDS)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def incr(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def reset(self):
+        with self._lock:
+            self._counts = dict.fromkeys(self.fields, 0)
+
+    def as_dict(self):
+        with self._lock:
+            counts = dict(self._counts)
+        if "hits" in counts and "misses" in counts:
+            lookups = counts["hits"] + counts["misses"]
+            counts["hit_rate"] = (round(counts["hits"] / lookups, 3)
+                                  if lookups else 0.0)
+        return counts
+
+
+cache_stats = CacheStats()
+
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def cached_search(func=None, *, key=None):
+    """
+    Кэширует результаты поиска и объединяет одновременные одинаковые
+    запросы: пока идёт обращение к API, остальные вызовы с тем же query
+    ждут его результата. SearchError не кэшируется, а запоминается
+    на NEGATIVE_CACHE_TTL секунд в памяти процесса.
+
+    key(query) задаёт ключ кэша (по умолчанию — сам query).
+    """
+    if func is None:
+        return lambda f: cached_search(f, key=key)
+
+    in_flight = {}
+    failures = {}
+    lock = threading.Lock()
 
-def cached_search(func):
     @wraps(func)
     def wrapper(query, *args, **kwargs):
-        cached = get_cached_result(query)
+        cache_key = query if key is None else key(query)
+        cached = get_cached_result(cache_key)
         if cached is not None:
             logger.info("[Cached] Используется кэш для запроса.")
+            cache_stats.incr("hits")
             return cached
-        result = func(query, *args, **kwargs)
-        set_cached_result(query, result)
-        return result
+
+        with lock:
+            failed_at = failures.get(cache_key)
+            if failed_at is not None:
+                if time() - failed_at < NEGATIVE_CACHE_TTL:
+                    cache_stats.incr("negative_hits")
+                    raise SearchError("Недавний запрос завершился ошибкой")
+                del failures[cache_key]
+
+            call = in_flight.get(cache_key)
+            leader = call is None
+            if leader:
+                call = in_flight[cache_key] = _InFlight()
+
+        if not leader:
+            cache_stats.incr("coalesced")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        cache_stats.incr("misses")
+        try:
+            result = func(query, *args, **kwargs)
+        except SearchError as e:
+            cache_stats.incr("errors")
+            call.error = e
+            with lock:
+                now = time()
+                for stale, ts in list(failures.items()):
+                    if now - ts >= NEGATIVE_CACHE_TTL:
+                        del failures[stale]
+                failures[cache_key] = now
+            raise
+        except Exception as e:
+            call.error = e
+            raise
+        else:
+            set_cached_result(cache_key, result)
+            call.result = result
+            return result
+        finally:
+            with lock:
+                in_flight.pop(cache_key, None)
+            call.event.set()
 
     return wrapper
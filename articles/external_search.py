@@ -1,57 +1,205 @@
 # articles/external_search.py
 import logging
+import threading
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from time import sleep
 
 import requests
 from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
 
-from .decorators import cached_search
+from .decorators import SearchError, cached_search
+from .search_quota import backoff_delay, get_scheduler
+from .search_stub import SearchCorpus
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
 
 logger = logging.getLogger(__name__)
 
+_session = None
+_session_lock = threading.Lock()
+
 
-@cached_search
-def search_google_fragment(query):
+def get_session():
     """
-    Выполняет Google Custom Search и возвращает результаты.
+    Возвращает общий keep-alive requests.Session с пулом соединений.
+    Повторы выполняет get_with_backoff: каждая попытка должна пройти
+    через лимит запросов и попасть в дневной счётчик.
     """
-    api_key = settings.GOOGLE_API_KEY
-    cse_id = settings.GOOGLE_CSE_ID
-
-    if not api_key or not cse_id:
-        logger.warning("GOOGLE_API_KEY или"
-                       " GOOGLE_CSE_ID не заданы в settings.")
-        return []
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=settings.SEARCH_MAX_WORKERS,
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
 
-    url = "https://www.googleapis.com/customsearch/v1"
-    params = {
-        "key": api_key,
-        "cx": cse_id,
-        "q": query,
-        "num": 5,
-    }
 
+def _retry_after(response):
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-    except requests.HTTPError as e:
-        if response.status_code == 429:
-            logger.warning("Превышен лимит запросов (429).")
+        return float(response.headers.get("Retry-After", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def get_with_backoff(url, params, scheduler=None):
+    """
+    GET с повторами: ответы 429/5xx и сетевые ошибки повторяются
+    до SEARCH_RETRIES раз с экспоненциальной задержкой и джиттером
+    (не меньше Retry-After, если сервер его прислал). Если передан
+    scheduler, каждая попытка проходит через лимит запросов.
+    """
+    retries = settings.SEARCH_RETRIES
+    for attempt in range(retries + 1):
+        if scheduler is not None:
+            scheduler.acquire(timeout=settings.SEARCH_DEADLINE_SECONDS)
+        delay = backoff_delay(attempt)
+        try:
+            response = get_session().get(
+                url, params=params, timeout=settings.SEARCH_REQUEST_TIMEOUT
+            )
+        except requests.RequestException as e:
+            if attempt == retries:
+                raise
+            reason = str(e)
         else:
-            logger.error(f"HTTP Error: {e}")
-        return []
-    except requests.RequestException as e:
-        logger.error(f"Request Exception: {e}")
-        return []
-
-    results = [
-        {
-            "title": item.get("title"),
-            "url": item.get("link"),
-            "snippet": item.get("snippet"),
+            if (response.status_code not in RETRY_STATUSES
+                    or attempt == retries):
+                return response
+            reason = f"HTTP {response.status_code}"
+            delay = max(delay, _retry_after(response))
+        logger.warning(f"[Google Search] {reason}, повтор через "
+                       f"{delay:.1f} сек. ({attempt + 1}/{retries})")
+        sleep(delay)
+
+
+class SearchBackend(ABC):
+    """
+    Интерфейс поискового бэкенда. search(query) возвращает список
+    {"title", "url", "snippet"} или выбрасывает SearchError.
+    Бэкенд выбирается настройкой SEARCH_BACKEND (путь к классу).
+    """
+
+    name = "base"
+
+    def cache_key(self, query):
+        # Результаты разных бэкендов не должны смешиваться в кэше
+        return f"{self.name}:{query}"
+
+    @abstractmethod
+    def search(self, query):
+        ...
+
+
+class GoogleSearchBackend(SearchBackend):
+    """
+    Google Custom Search. SEARCH_API_URL позволяет направить запросы
+    на совместимый сервер, например run_search_stub.
+    """
+
+    name = "google"
+    DEFAULT_URL = "https://www.googleapis.com/customsearch/v1"
+
+    def __init__(self):
+        self.url = settings.SEARCH_API_URL or self.DEFAULT_URL
+        self.api_key = settings.GOOGLE_API_KEY
+        self.cse_id = settings.GOOGLE_CSE_ID
+
+    @property
+    def is_google(self):
+        return self.url == self.DEFAULT_URL
+
+    def cache_key(self, query):
+        # Ключи настоящего Google совпадают с ключами старого кэша
+        if self.is_google:
+            return query
+        return f"{self.url}:{query}"
+
+    def search(self, query):
+        if not self.api_key or not self.cse_id:
+            logger.warning("GOOGLE_API_KEY или"
+                           " GOOGLE_CSE_ID не заданы в settings.")
+            raise SearchError("Google Custom Search не настроен")
+
+        params = {
+            "key": self.api_key,
+            "cx": self.cse_id,
+            "q": query,
+            "num": 5,
         }
-        for item in data.get("items", [])
-    ]
 
-    logger.info(f"[Google Search] Найдено совпадений: {len(results)}")
-    return results
+        try:
+            # Лимит и квота относятся только к настоящему Google:
+            # нагрузочный тест на локальной замене их не расходует
+            scheduler = get_scheduler() if self.is_google else None
+            response = get_with_backoff(self.url, params, scheduler)
+            response.raise_for_status()
+            data = response.json()
+        except requests.HTTPError as e:
+            if response.status_code == 429:
+                logger.warning("Превышен лимит запросов (429).")
+            else:
+                logger.error(f"HTTP Error: {e}")
+            raise SearchError(str(e)) from e
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"Request Exception: {e}")
+            raise SearchError(str(e)) from e
+
+        results = [
+            {
+                "title": item.get("title"),
+                "url": item.get("link"),
+                "snippet": item.get("snippet"),
+            }
+            for item in data.get("items", [])
+        ]
+
+        logger.info(f"[Google Search] Найдено совпадений: {len(results)}")
+        return results
+
+
+@lru_cache(maxsize=4)
+def _load_corpus(path):
+    return SearchCorpus.load(path or None)
+
+
+class FixtureSearchBackend(SearchBackend):
+    """
+    Поиск по локальному корпусу (SEARCH_FIXTURE_CORPUS) прямо в процессе,
+    без HTTP и без расхода квоты: для тестов и профилирования анализа.
+    """
+
+    name = "fixture"
+
+    def __init__(self):
+        self.corpus = _load_corpus(settings.SEARCH_FIXTURE_CORPUS)
+
+    def search(self, query):
+        return self.corpus.search(query)
+
+
+def get_search_backend():
+    return import_string(settings.SEARCH_BACKEND)()
+
+
+@cached_search(key=lambda query: get_search_backend().cache_key(query))
+def search_fragment(query):
+    """
+    Ищет фрагмент через настроенный бэкенд и возвращает результаты.
+    При ошибке API или сети выбрасывает SearchError, чтобы отличить
+    сбой от честного «ничего не найдено»; при исчерпанной дневной
+    квоте — QuotaExceededError.
+    """
+    return get_search_backend().search(query)
+
+
+# Старое имя, под которым функцию импортирует внешний код
+search_google_fragment = search_fragment
@@ -1,10 +1,67 @@
 # articles/forms.py
+from datetime import datetime, time, timedelta
+
 from django import forms
+from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 from .models import Report
 
 
+def _start_of(day):
+    # Начало суток в текущем часовом поясе: сравнение с created_at
+    # без приведения столбца к дате использует индексы
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
 class ReportForm(forms.ModelForm):
     class Meta:
         model = Report
         fields = ["title", "content", "file"]
+
+
+class ReportFilterForm(forms.Form):
+    """
+    Фильтр докладов для API и выгрузки справок: автор (email), статус
+    и интервал дат регистрации доклада (включительно).
+    """
+
+    author = forms.EmailField(required=False)
+    status = forms.ChoiceField(
+        choices=[("", "Любой")] + Report.STATUS_CHOICES, required=False
+    )
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+
+    def clean(self):
+        cleaned = super().clean()
+        date_from, date_to = cleaned.get("date_from"), cleaned.get("date_to")
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError("Начало интервала позже конца.")
+        return cleaned
+
+    def filter(self, queryset):
+        data = self.cleaned_data
+        if data["author"]:
+            # Автор по точному email (уникальный индекс), дальше — фильтр
+            # по author_id, который попадает в индекс (author, created_at)
+            User = get_user_model()
+            author_id = (
+                User.objects
+                .filter(email=User.objects.normalize_email(data["author"]))
+                .values_list("pk", flat=True).first()
+            )
+            if author_id is None:
+                return queryset.none()
+            queryset = queryset.filter(author_id=author_id)
+        if data["status"]:
+            queryset = queryset.filter(status=data["status"])
+        if data["date_from"]:
+            queryset = queryset.filter(
+                created_at__gte=_start_of(data["date_from"])
+            )
+        if data["date_to"]:
+            queryset = queryset.filter(
+                created_at__lt=_start_of(data["date_to"] + timedelta(days=1))
+            )
+        return queryset
@@ -0,0 +1,144 @@
+# articles/fragmenters.py
+"""
+Стратегии нарезки текста на фрагменты для поиска.
+
+Фрагментер — это базовая стратегия нарезки (окна или предложения)
+и необязательные фильтры: отбрасывание «шумных» фрагментов,
+удаление дубликатов и бюджет запросов с равномерной по документу
+(стратифицированной) выборкой. Настраивается через settings.FRAGMENTER.
+"""
+import re
+
+from django.conf import settings
+
+from .similarity import (FRAGMENT_SIZE, FRAGMENT_STEP, MIN_FRAGMENT_WORDS,
+                         split_into_fragments)
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be been but by for from had has have he her his i if
+    in into is it its me my no not of on or our she so such than that the
+    their them then there these they this to was we were what when which
+    who will with you your
+    а без более бы был была были было быть в вам вас весь во вот все всё
+    всего всех вы где да даже для до его ее её если есть еще ещё же за здесь
+    и из или им их к как ко когда кто ли либо мне может мы на над надо наш
+    не него нее неё нет ни них но ну о об однако он она они оно от очень по
+    под при с со так также такой там те тем то того тоже той только том ты
+    у уже хотя чего чей чем что чтобы чье чья эта эти это этого этой этот я
+    """.split()
+)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _normalize(fragment):
+    return " ".join(fragment.lower().split())
+
+
+def sentence_fragments(text, size=FRAGMENT_SIZE,
+                       min_words=MIN_FRAGMENT_WORDS):
+    """
+    Фрагменты по границам предложений: короткие предложения склеиваются
+    до size слов, длинные режутся на окна без перекрытия.
+    """
+    fragments = []
+    current = []
+    for sentence in _SENTENCE_END.split(text):
+        words = sentence.split()
+        if len(words) > size:
+            if len(current) >= min_words:
+                fragments.append(" ".join(current))
+            current = []
+            fragments.extend(split_into_fragments(sentence, size, size,
+                                                 min_words))
+            continue
+        if len(current) + len(words) > size:
+            if len(current) >= min_words:
+                fragments.append(" ".join(current))
+            current = []
+        current.extend(words)
+    if len(current) >= min_words:
+        fragments.append(" ".join(current))
+    return fragments
+
+
+def noise_ratio(fragment):
+    """
+    Доля стоп-слов и чисел среди слов фрагмента.
+    """
+    words = _WORD.findall(fragment.lower())
+    if not words:
+        return 1.0
+    noise = sum(1 for w in words if w in STOPWORDS or w.isdigit())
+    return noise / len(words)
+
+
+def stratified_sample(items, budget):
+    """
+    Берёт не более budget элементов, по одному из каждой из budget
+    равных по длине частей списка (середину части), сохраняя порядок.
+    Выбор детерминирован, поэтому повторный анализ того же текста
+    запрашивает те же фрагменты.
+    """
+    if budget is None or len(items) <= budget:
+        return list(items)
+    if budget <= 0:
+        return []
+    step = len(items) / budget
+    return [items[int(step * k + step / 2)] for k in range(budget)]
+
+
+class Fragmenter:
+    STRATEGIES = ("window", "sentence")
+
+    def __init__(self, strategy="window", size=FRAGMENT_SIZE,
+                 step=FRAGMENT_STEP, min_words=MIN_FRAGMENT_WORDS,
+                 max_noise_ratio=None, dedupe=False, max_queries=None):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Неизвестная стратегия нарезки: {strategy}")
+        self.strategy = strategy
+        self.size = size
+        self.step = step
+        self.min_words = min_words
+        self.max_noise_ratio = max_noise_ratio
+        self.dedupe = dedupe
+        self.max_queries = max_queries
+
+    def __repr__(self):
+        return (f"Fragmenter(strategy={self.strategy!r}, size={self.size}, "
+                f"step={self.step}, max_noise_ratio={self.max_noise_ratio}, "
+                f"dedupe={self.dedupe}, max_queries={self.max_queries})")
+
+    def split(self, text):
+        if self.strategy == "sentence":
+            fragments = sentence_fragments(text, self.size, self.min_words)
+        else:
+            fragments = split_into_fragments(text, self.size, self.step,
+                                             self.min_words)
+
+        if self.max_noise_ratio is not None:
+            fragments = [f for f in fragments
+                         if noise_ratio(f) <= self.max_noise_ratio]
+
+        if self.dedupe:
+            seen = set()
+            unique = []
+            for fragment in fragments:
+                key = _normalize(fragment)
+                if key not in seen:
+                    seen.add(key)
+                    unique.append(fragment)
+            fragments = unique
+
+        return stratified_sample(fragments, self.max_queries)
+
+
+def get_fragmenter(config=None):
+    """
+    Фрагментер из словаря настроек (по умолчанию settings.FRAGMENTER).
+    """
+    if config is None:
+        config = settings.FRAGMENTER
+    return Fragmenter(**config)
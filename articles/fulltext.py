@@ -0,0 +1,136 @@
+# articles/fulltext.py
+"""
+Полнотекстовый поиск по названию и тексту докладов.
+
+PostgreSQL: генерируемый столбец articles_report.search_vector
+(tsvector, русская и английская конфигурации, название с весом A,
+текст — B) с GIN-индексом; БД сама пересчитывает его при сохранении.
+SQLite (локальный запуск и тесты): внешняя FTS5-таблица
+articles_report_fts, которую поддерживают триггеры.
+Обе схемы создаёт миграция 0018_report_fulltext. SQLite меняет схему
+articles_report пересозданием таблицы, и триггеры пропадают вместе
+со старой таблицей, поэтому после каждого migrate их восстанавливает
+ensure_sqlite_triggers (обработчик post_migrate в articles.signals).
+"""
+import logging
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "articles_report_fts"
+
+# Те же триггеры, что создаёт миграция 0018_report_fulltext
+SQLITE_TRIGGERS = {
+    "articles_report_fts_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS articles_report_fts_insert
+        AFTER INSERT ON articles_report
+        BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, title, content)
+            VALUES (new.id, new.title, new.content);
+        END
+    """,
+    "articles_report_fts_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS articles_report_fts_delete
+        AFTER DELETE ON articles_report
+        BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, content)
+            VALUES ('delete', old.id, old.title, old.content);
+        END
+    """,
+    "articles_report_fts_update": f"""
+        CREATE TRIGGER IF NOT EXISTS articles_report_fts_update
+        AFTER UPDATE OF title, content ON articles_report
+        BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, content)
+            VALUES ('delete', old.id, old.title, old.content);
+            INSERT INTO {FTS_TABLE} (rowid, title, content)
+            VALUES (new.id, new.title, new.content);
+        END
+    """,
+}
+
+_PG_QUERY = ("(websearch_to_tsquery('russian', %s) || "
+             "websearch_to_tsquery('english', %s))")
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def ensure_sqlite_triggers(using=DEFAULT_DB_ALIAS):
+    """
+    Создаёт недостающие триггеры FTS5-индекса в SQLite и перестраивает
+    индекс, если триггеров не было (строки могли измениться без них).
+    Возвращает имена созданных триггеров.
+    """
+    conn = connections[using]
+    if conn.vendor != "sqlite":
+        return []
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name = %s "
+            "OR (type = 'trigger' AND tbl_name = 'articles_report')",
+            (FTS_TABLE,),
+        )
+        existing = {name for (name,) in cursor.fetchall()}
+        if FTS_TABLE not in existing:
+            return []  # миграция 0018 ещё не применена
+        missing = [name for name in SQLITE_TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(SQLITE_TRIGGERS[name])
+        if missing:
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) "
+                           f"VALUES ('rebuild')")
+    if missing:
+        logger.warning(f"[Search] Восстановлены триггеры полнотекстового "
+                       f"индекса: {', '.join(missing)}")
+    return missing
+
+
+def _fts5_query(text):
+    # Каждое слово — отдельная строка в кавычках: спецсимволы запроса
+    # FTS5 (кавычки, двоеточия, NEAR) в пользовательском вводе не работают
+    return " ".join(f'"{word}"' for word in _WORD_RE.findall(text))
+
+
+def matching_ids(text):
+    """
+    Подзапрос id докладов, найденных по text, — для filter(pk__in=...).
+    Не ссылается на внешний запрос, поэтому годится и во вложенных
+    запросах (админка).
+    """
+    if connection.vendor == "postgresql":
+        return RawSQL(f"SELECT id FROM articles_report "
+                      f"WHERE search_vector @@ {_PG_QUERY}", (text, text))
+    query = _fts5_query(text)
+    if not query:
+        # Пустой запрос FTS5 — синтаксическая ошибка
+        return RawSQL("SELECT id FROM articles_report WHERE 0 = 1", ())
+    return RawSQL(f"SELECT rowid FROM {FTS_TABLE} "
+                  f"WHERE {FTS_TABLE} MATCH %s", (query,))
+
+
+def search_reports(queryset, text):
+    """
+    Доклады из queryset, найденные по text, с релевантностью rank
+    (чем больше, тем лучше), отсортированные по убыванию rank.
+    """
+    if connection.vendor == "postgresql":
+        rank = RawSQL(
+            f"ts_rank_cd(articles_report.search_vector, {_PG_QUERY})",
+            (text, text), output_field=FloatField(),
+        )
+    else:
+        if not _fts5_query(text):
+            return queryset.none()
+        # bm25 тем меньше, чем документ релевантнее; название весит больше
+        rank = RawSQL(
+            f"(SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s "
+            f"AND {FTS_TABLE}.rowid = articles_report.id)",
+            (_fts5_query(text),), output_field=FloatField(),
+        )
+    return (queryset.filter(pk__in=matching_ids(text)).annotate(rank=rank)
+            .order_by("-rank", "-id"))
@@ -0,0 +1,127 @@
+# articles/inference_server.py
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceServerMetrics:
+    def __init__(self, max_batch_size):
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.batches = 0
+            self.items = 0
+            self.queue_wait_total = 0.0
+            self.queue_wait_max = 0.0
+
+    def record_batch(self, waits):
+        with self._lock:
+            self.batches += 1
+            self.items += len(waits)
+            self.queue_wait_total += sum(waits)
+            self.queue_wait_max = max(self.queue_wait_max, *waits)
+
+    def as_dict(self):
+        with self._lock:
+            avg_batch = self.items / self.batches if self.batches else 0.0
+            avg_wait = (self.queue_wait_total / self.items
+                        if self.items else 0.0)
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": round(avg_batch, 2),
+                "avg_batch_fill": round(avg_batch / self.max_batch_size, 3),
+                "avg_queue_wait_ms": round(avg_wait * 1000, 2),
+                "max_queue_wait_ms": round(self.queue_wait_max * 1000, 2),
+            }
+
+
+class InferenceServer:
+    """
+    Собирает запросы от всех потоков процесса в общие пакеты.
+
+    Фоновый поток берёт первый запрос из очереди и ждёт остальные
+    не дольше max_wait_ms или пока пакет не наберёт max_batch_size
+    элементов, затем вызывает run_batch(items) один раз для всего пакета
+    и раздаёт результаты вызывающим через Future.
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=5,
+                 max_queue_size=256):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue_size = max_queue_size
+        self.metrics = InferenceServerMetrics(self.max_batch_size)
+        self._lock = threading.Lock()
+        self._queue = None
+        self._pid = None
+
+    def _ensure_started(self):
+        # Поток не переживает fork, поэтому в дочернем процессе
+        # очередь и поток создаются заново
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.max_queue_size)
+            threading.Thread(target=self._loop, name="inference-server",
+                             daemon=True).start()
+            self._pid = os.getpid()
+
+    def submit(self, item, timeout=None):
+        """
+        Ставит элемент в очередь. Если очередь заполнена дольше timeout
+        секунд, выбрасывает queue.Full.
+        """
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()),
+                        timeout=timeout)
+        return future
+
+    def infer(self, items, timeout=None):
+        futures = [self.submit(item, timeout=timeout) for item in items]
+        return [future.result() for future in futures]
+
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect_batch()
+            started = time.perf_counter()
+            self.metrics.record_batch(
+                [started - enqueued for _, _, enqueued in batch]
+            )
+            try:
+                results = self.run_batch([item for item, _, _ in batch])
+            except Exception as e:
+                logger.exception("[Inference] Ошибка при обработке пакета")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
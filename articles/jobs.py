@@ -0,0 +1,314 @@
+# articles/jobs.py
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .ai_detection import inference_metrics
+from .decorators import cache_stats
+from .metrics import record_run
+from .models import (AnalysisJob, PlagiarismCheck, PlagiarismMatch,
+                     normalized_text_hash)
+from .search_quota import QuotaExceededError
+from .use_cases import (IncompleteCoverageError, analysis_config_version,
+                        analyze_report_logic, get_certificate)
+
+logger = logging.getLogger(__name__)
+
+# Прогресс поиска фрагментов занимает 0–90 %, остальное — детекция ИИ
+SEARCH_PROGRESS_SHARE = 90
+
+
+def enqueue_analysis(report, force=False):
+    """
+    Ставит доклад в очередь на анализ. Если для доклада уже есть
+    незавершённая задача, возвращает её вместо создания новой.
+    Одновременные вызовы не создадут дубликат: его отсекает
+    ограничение unique_active_analysis_job.
+
+    Если такой же текст того же автора уже проверялся с текущими
+    настройками, результат переиспользуется сразу (см.
+    reuse_previous_check); force=True ставит в очередь полный анализ.
+    Воркер всегда выполняет полный анализ.
+    """
+    active = AnalysisJob.objects.filter(
+        report=report, status__in=AnalysisJob.ACTIVE_STATUSES
+    )
+    job = active.first()
+    if job is not None:
+        return job
+    if not force:
+        job = reuse_previous_check(report)
+        if job is not None:
+            return job
+    try:
+        with transaction.atomic():
+            return AnalysisJob.objects.create(report=report)
+    except IntegrityError:
+        # Задачу только что создал параллельный запрос
+        return active.first()
+
+
+def reuse_previous_check(report):
+    """
+    Ищет проверку того же нормализованного текста с той же версией
+    настроек анализа среди докладов того же автора и копирует её
+    оценки и совпадения в завершённую задачу доклада. Возвращает
+    задачу или None, если переиспользовать нечего.
+
+    Тексты других авторов не переиспользуются: совпадение с чужим
+    докладом должен найти локальный индекс при полном анализе.
+    """
+    if not report.content_hash:
+        return None
+    source = (
+        PlagiarismCheck.objects.filter(
+            content_hash=report.content_hash,
+            config_version=analysis_config_version(),
+            report__author_id=report.author_id,
+            ai_generated_percent__isnull=False,
+            # Проверка с пропущенными фрагментами могла занизить
+            # заимствования — такую не тиражируем
+            coverage__gte=1.0,
+        )
+        .order_by("-checked_at", "-id")
+        .first()
+    )
+    if source is None:
+        return None
+
+    now = timezone.now()
+    with transaction.atomic():
+        job = AnalysisJob.objects.create(
+            report=report, status="done", progress=100, started_at=now,
+            finished_at=now, stats={"reused_check": source.pk},
+        )
+        check = PlagiarismCheck.objects.create(
+            report=report, job=job,
+            originality_percent=source.originality_percent,
+            ai_generated_percent=source.ai_generated_percent,
+            content_hash=source.content_hash,
+            config_version=source.config_version,
+            coverage=source.coverage,
+        )
+        PlagiarismMatch.objects.bulk_create(
+            [
+                PlagiarismMatch(
+                    plagiarism_check=check, position=match.position,
+                    fragment=match.fragment,
+                    similarity_percent=match.similarity_percent,
+                    url=match.url, title=match.title, snippet=match.snippet,
+                )
+                for match in source.matches.all()
+            ],
+            batch_size=500,
+        )
+        report.originality_percent = float(source.originality_percent)
+        report.ai_generated_percent = source.ai_generated_percent
+        report.save(update_fields=["originality_percent",
+                                   "ai_generated_percent"])
+    logger.info(f"[Jobs] Доклад #{report.pk}: переиспользована проверка "
+                f"#{source.pk} доклада #{source.report_id}")
+    return job
+
+
+def recover_stale_jobs():
+    """
+    Возвращает в очередь задачи, воркер которых перестал подавать
+    признаки жизни (убит, OOM при загрузке модели и т.п.). После
+    ANALYSIS_JOB_MAX_ATTEMPTS попыток задача завершается ошибкой.
+    Возвращает число восстановленных задач.
+    """
+    cutoff = timezone.now() - timedelta(
+        seconds=settings.ANALYSIS_JOB_STALE_SECONDS
+    )
+    stale = AnalysisJob.objects.filter(status="running").filter(
+        Q(heartbeat_at__lt=cutoff)
+        # Задачи, начатые до появления heartbeat_at
+        | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+    failed = stale.filter(
+        attempts__gte=settings.ANALYSIS_JOB_MAX_ATTEMPTS
+    ).update(
+        status="failed",
+        error="Воркер анализа остановился во время проверки",
+        finished_at=timezone.now(),
+    )
+    requeued = stale.update(status="queued", progress=0)
+    if failed or requeued:
+        logger.warning(f"[Jobs] Брошенных задач: возвращено в очередь "
+                       f"{requeued}, завершено с ошибкой {failed}")
+    return failed + requeued
+
+
+def claim_next_job():
+    """
+    Атомарно забирает самую старую задачу из очереди.
+    SKIP LOCKED позволяет нескольким воркерам не блокировать друг друга.
+    """
+    recover_stale_jobs()
+    with transaction.atomic():
+        job = (
+            AnalysisJob.objects.select_for_update(skip_locked=True)
+            .filter(status="queued")
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        now = timezone.now()
+        job.status = "running"
+        job.progress = 0
+        job.started_at = now
+        job.heartbeat_at = now
+        job.attempts = F("attempts") + 1
+        job.save(update_fields=["status", "progress", "started_at",
+                                "heartbeat_at", "attempts"])
+    job.refresh_from_db(fields=["attempts"])
+    return job
+
+
+def _make_progress_callback(job):
+    last_saved = {"value": -1}
+
+    def callback(done, total):
+        value = int(done * SEARCH_PROGRESS_SHARE / total) if total else 0
+        # Пишем в БД только при изменении процента
+        if value != last_saved["value"]:
+            last_saved["value"] = value
+            AnalysisJob.objects.filter(pk=job.pk).update(
+                progress=value, heartbeat_at=timezone.now()
+            )
+
+    return callback
+
+
+@contextmanager
+def _heartbeat(job):
+    """
+    Пока выполняется блок, фоновый поток каждые
+    ANALYSIS_JOB_HEARTBEAT_SECONDS обновляет heartbeat_at задачи:
+    детекция ИИ, сохранение результатов и рендеринг справки не вызывают
+    колбэк прогресса, а задача без обновлений считается брошенной.
+    """
+    stop = threading.Event()
+
+    def tick():
+        try:
+            while not stop.wait(settings.ANALYSIS_JOB_HEARTBEAT_SECONDS):
+                try:
+                    AnalysisJob.objects.filter(
+                        pk=job.pk, status="running"
+                    ).update(heartbeat_at=timezone.now())
+                except Exception:
+                    logger.exception(f"[Job {job.pk}] Не удалось "
+                                     f"обновить heartbeat_at")
+        finally:
+            # У потока своё соединение с БД
+            connection.close()
+
+    thread = threading.Thread(target=tick, name=f"job-{job.pk}-heartbeat",
+                              daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def save_plagiarism_check(job, originality_percent, ai_score, matches):
+    """
+    Сохраняет результат анализа как PlagiarismCheck с построчными
+    совпадениями PlagiarismMatch.
+    """
+    with transaction.atomic():
+        check = PlagiarismCheck.objects.create(
+            report=job.report, job=job,
+            originality_percent=round(originality_percent, 2),
+            ai_generated_percent=round(ai_score, 2),
+            content_hash=normalized_text_hash(job.report.content),
+            config_version=analysis_config_version(),
+            coverage=job.stats.get("coverage"),
+        )
+        PlagiarismMatch.objects.bulk_create(
+            [
+                PlagiarismMatch(
+                    plagiarism_check=check, position=position,
+                    fragment=match["fragment"],
+                    similarity_percent=match["similarity_percent"],
+                    url=match["url"],
+                    title=match.get("title") or "",
+                    snippet=match.get("snippet") or "",
+                )
+                for position, match in enumerate(matches)
+            ],
+            batch_size=500,
+        )
+    return check
+
+
+def run_job(job):
+    """
+    Выполняет анализ доклада; совпадения сохраняются
+    в PlagiarismCheck, статус и статистика — в задаче.
+    """
+    update_fields = ["status", "error", "finished_at", "stats"]
+    job.stats = {}
+    with _heartbeat(job):
+        try:
+            originality, ai_score, details = analyze_report_logic(
+                job.report, progress_callback=_make_progress_callback(job),
+                stats=job.stats,
+            )
+            save_plagiarism_check(job, originality, ai_score, details)
+        except (QuotaExceededError, IncompleteCoverageError) as e:
+            # Не сбой, а исчерпанная квота или неполный поиск: текст ошибки
+            # увидит пользователь
+            logger.warning(f"[Job {job.pk}] {e}")
+            job.status = "failed"
+            job.error = str(e)
+        except Exception as e:
+            logger.exception(f"[Job {job.pk}] Ошибка анализа")
+            job.status = "failed"
+            job.error = str(e)
+        else:
+            job.status = "done"
+            job.progress = 100
+            update_fields.append("progress")
+            try:
+                record_run(job.stats)
+            except Exception:
+                logger.exception(f"[Job {job.pk}] Не удалось обновить "
+                                 f"метрики")
+            try:
+                # Справка готова к первому скачиванию
+                get_certificate(job.report)
+            except Exception:
+                logger.exception(f"[Job {job.pk}] Не удалось подготовить "
+                                 f"справку")
+    job.finished_at = timezone.now()
+    job.save(update_fields=update_fields)
+    return job
+
+
+def process_next_job():
+    """
+    Забирает и выполняет одну задачу. Возвращает False, если очередь пуста.
+    """
+    job = claim_next_job()
+    if job is None:
+        return False
+    logger.info(f"[Job {job.pk}] Анализ доклада #{job.report_id}")
+    run_job(job)
+    # Счётчики накапливаются в процессе воркера с момента запуска
+    logger.info(f"[Job {job.pk}] Кэш поиска: {cache_stats.as_dict()}")
+    metrics = inference_metrics()
+    if metrics is not None:
+        logger.info(f"[Job {job.pk}] Пакеты детекции ИИ: {metrics}")
+    return True
@@ -0,0 +1,172 @@
+# articles/local_index.py
+"""
+Офлайн-поиск совпадений с уже загруженными докладами.
+
+Каждый фрагмент доклада (те же окна, что и при поиске в Google)
+разбивается на шинглы по SHINGLE_SIZE слов, для них считается
+MinHash-подпись из NUM_BANDS * ROWS_PER_BAND значений, а подпись
+режется на полосы (LSH). Хэш каждой полосы хранится в
+ReportFragmentBand, поэтому кандидаты находятся одним запросом
+band_key IN (...) без обращения к сети.
+"""
+import hashlib
+import logging
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.urls import reverse
+
+from .models import Report, ReportFragmentBand
+from .similarity import (PLAGIARISM_THRESHOLD, batch_similarity_percent,
+                         split_into_fragments)
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 3
+NUM_BANDS = 20
+ROWS_PER_BAND = 3
+NUM_PERM = NUM_BANDS * ROWS_PER_BAND
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 61, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 61, size=NUM_PERM, dtype=np.uint64)
+
+
+def _shingles(fragment):
+    words = fragment.lower().split()
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {
+        " ".join(words[i: i + SHINGLE_SIZE])
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def _hash32(value):
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "little")
+
+
+def minhash_signature(fragment):
+    """
+    MinHash-подпись фрагмента: NUM_PERM минимумов по шинглам.
+    """
+    shingles = _shingles(fragment)
+    if not shingles:
+        return None
+    hashes = np.array([_hash32(s) for s in shingles], dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+    return (permuted & _MAX_HASH).min(axis=0)
+
+
+def band_keys(signature):
+    """
+    Хэши LSH-полос подписи в виде знаковых 64-битных целых (BigIntegerField).
+    """
+    keys = []
+    for band in range(NUM_BANDS):
+        rows = signature[band * ROWS_PER_BAND: (band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(
+            band.to_bytes(2, "little") + rows.tobytes(), digest_size=8
+        ).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def _fragment_band_keys(fragments):
+    result = []
+    for fragment in fragments:
+        signature = minhash_signature(fragment)
+        result.append(band_keys(signature) if signature is not None else [])
+    return result
+
+
+def index_report(report):
+    """
+    Пересобирает LSH-корзины доклада. Вызывается при каждом сохранении
+    текста, поэтому индекс обновляется инкрементально.
+    """
+    fragments = split_into_fragments(report.content or "")
+    rows = [
+        ReportFragmentBand(report_id=report.pk, fragment_index=index,
+                           band_key=key)
+        for index, keys in enumerate(_fragment_band_keys(fragments))
+        for key in keys
+    ]
+    with transaction.atomic():
+        ReportFragmentBand.objects.filter(report_id=report.pk).delete()
+        ReportFragmentBand.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def find_local_matches(fragments, exclude_report_id=None):
+    """
+    Ищет фрагменты, совпадающие с уже загруженными докладами.
+    Возвращает {индекс фрагмента: (процент, совпадение)} в формате
+    detailed_matches; в словарь попадают только совпадения
+    не ниже PLAGIARISM_THRESHOLD.
+    """
+    key_owners = defaultdict(set)
+    for index, keys in enumerate(_fragment_band_keys(fragments)):
+        for key in keys:
+            key_owners[key].add(index)
+    if not key_owners:
+        return {}
+
+    bands = ReportFragmentBand.objects.filter(band_key__in=list(key_owners))
+    if exclude_report_id is not None:
+        bands = bands.exclude(report_id=exclude_report_id)
+
+    candidates = defaultdict(set)
+    for key, report_id, fragment_index in bands.values_list(
+        "band_key", "report_id", "fragment_index"
+    ):
+        for index in key_owners[key]:
+            candidates[index].add((report_id, fragment_index))
+    if not candidates:
+        return {}
+
+    report_ids = {rid for pairs in candidates.values() for rid, _ in pairs}
+    reports = {
+        report.pk: (report, split_into_fragments(report.content or ""))
+        for report in Report.objects.filter(pk__in=report_ids).only(
+            "id", "title", "content"
+        )
+    }
+
+    pairs = []
+    owners = []
+    for index, found in candidates.items():
+        for report_id, fragment_index in found:
+            report, report_fragments = reports.get(report_id, (None, []))
+            if fragment_index >= len(report_fragments):
+                continue  # индекс устарел относительно текста
+            pairs.append((fragments[index], report_fragments[fragment_index]))
+            owners.append((index, report))
+
+    matches = {}
+    for (index, report), (_, snippet), sim_percent in zip(
+        owners, pairs, batch_similarity_percent(pairs)
+    ):
+        if sim_percent < PLAGIARISM_THRESHOLD:
+            continue
+        if index in matches and matches[index][0] >= sim_percent:
+            continue
+        matches[index] = (
+            sim_percent,
+            {
+                "fragment": fragments[index],
+                "similarity_percent": sim_percent,
+                "url": reverse("report_info", args=[report.pk]),
+                "title": report.title,
+                "snippet": snippet,
+            },
+        )
+
+    logger.info(f"[Local index] Совпадений с докладами: {len(matches)}")
+    return matches
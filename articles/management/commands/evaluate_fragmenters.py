@@ -0,0 +1,163 @@
+# articles/management/commands/evaluate_fragmenters.py
+import statistics
+
+from django.core.management.base import BaseCommand
+
+from articles.cache_utils import get_cached_result
+from articles.fragmenters import Fragmenter
+from articles.local_index import find_local_matches
+from articles.models import Report
+from articles.similarity import PLAGIARISM_THRESHOLD, score_fragment_matches
+
+# Эталон — текущая нарезка: окна по 25 слов с шагом 20, без бюджета
+BASELINE = ("window 25/20", {})
+
+STRATEGIES = [
+    ("window 25/25", {"step": 25}),
+    ("window 40/40", {"size": 40, "step": 40}),
+    ("sentence 25", {"strategy": "sentence"}),
+    ("window+filter", {"max_noise_ratio": 0.6, "dedupe": True}),
+]
+
+
+def _locate(words, fragment_words, cursor):
+    """
+    Позиция фрагмента в тексте (по словам), начиная поиск с cursor;
+    если после cursor не найден — с начала текста.
+    """
+    size = len(fragment_words)
+    for start in list(range(cursor, len(words))) + list(range(cursor)):
+        if words[start: start + size] == fragment_words:
+            return start
+    return None
+
+
+def baseline_evidence(words):
+    """
+    Закэшированные результаты поиска окон эталона: [(начало, конец,
+    результаты)]. В кэше есть только запросы, которые реально
+    отправлял эталон, поэтому оракулом служат именно они.
+    """
+    fragmenter = Fragmenter(**BASELINE[1])
+    evidence = []
+    for start in range(0, len(words), fragmenter.step):
+        window = words[start: start + fragmenter.size]
+        if len(window) < fragmenter.min_words:
+            continue
+        cached = get_cached_result(" ".join(window))
+        if cached is not None:
+            evidence.append((start, start + len(window), cached))
+    return evidence
+
+
+def offline_originality(fragments, words, evidence, report_id):
+    """
+    Оригинальность без обращения к сети. Фрагмент сравнивается со
+    сниппетами всех окон эталона, которые он перекрывает, и с локальным
+    индексом. Фрагменты без единого источника сравнения считаются
+    непроверенными и, как в analyze_text_fragments, не входят
+    в знаменатель. Возвращает (оригинальность, покрытие).
+    """
+    if not fragments:
+        return 100.0, 1.0
+    matches = find_local_matches(fragments, exclude_report_id=report_id)
+    search_results = {}
+    cursor = 0
+    for index, fragment in enumerate(fragments):
+        fragment_words = fragment.split()
+        start = _locate(words, fragment_words, cursor)
+        if start is None or index in matches:
+            continue
+        cursor = start + 1
+        end = start + len(fragment_words)
+        snippets = [result
+                    for a, b, results in evidence if a < end and start < b
+                    for result in results]
+        if snippets:
+            search_results[index] = snippets
+    matches.update(score_fragment_matches(fragments, search_results))
+
+    checked = set(matches) | set(search_results)
+    if not checked:
+        return 100.0, 0.0
+    hits = sum(1 for score, match in matches.values()
+               if score >= PLAGIARISM_THRESHOLD and match)
+    originality = max(0.0, 100.0 - hits / len(checked) * 100.0)
+    return originality, len(checked) / len(fragments)
+
+
+class Command(BaseCommand):
+    help = ("Офлайн-сравнение стратегий нарезки на фрагменты: число "
+            "запросов к поиску и отклонение оригинальности от эталона")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reports", type=int, default=100,
+                            help="Сколько последних докладов взять")
+        parser.add_argument("--budgets", type=int, nargs="*",
+                            default=[10, 20, 40],
+                            help="Бюджеты запросов на доклад для выборки")
+
+    def handle(self, *args, **options):
+        strategies = list(STRATEGIES)
+        for budget in options["budgets"]:
+            strategies.append((f"budget {budget}", {"max_queries": budget}))
+            strategies.append((f"filter+budget {budget}", {
+                "max_noise_ratio": 0.6, "dedupe": True,
+                "max_queries": budget,
+            }))
+
+        reports = list(
+            Report.objects.exclude(content="")
+            .only("id", "content")
+            .order_by("-id")[: options["reports"]]
+        )
+        if not reports:
+            self.stdout.write("Нет докладов для оценки")
+            return
+
+        words = {report.pk: report.content.split() for report in reports}
+        evidence = {pk: baseline_evidence(w) for pk, w in words.items()}
+
+        queries = {}
+        coverage = {}
+        originality = {}
+        for name, config in [BASELINE] + strategies:
+            fragmenter = Fragmenter(**config)
+            queries[name] = []
+            coverage[name] = []
+            originality[name] = []
+            for report in reports:
+                fragments = fragmenter.split(report.content)
+                value, covered = offline_originality(
+                    fragments, words[report.pk], evidence[report.pk],
+                    report.pk,
+                )
+                queries[name].append(len(fragments))
+                coverage[name].append(covered)
+                originality[name].append(value)
+
+        reference = originality[BASELINE[0]]
+        deviations = {
+            name: [abs(a - b) for a, b in zip(values, reference)]
+            for name, values in originality.items()
+        }
+
+        self.stdout.write(f"Докладов: {len(reports)}")
+        self.stdout.write(
+            f"{'стратегия':<22} {'запросов ср.':>12} {'доля':>6} "
+            f"{'покрытие':>8} {'откл. ср.':>9} {'откл. max':>9}"
+        )
+        base_queries = sum(queries[BASELINE[0]]) or 1
+        for name in [BASELINE[0]] + [n for n, _ in strategies]:
+            self.stdout.write(
+                f"{name:<22} {statistics.mean(queries[name]):12.1f} "
+                f"{sum(queries[name]) / base_queries:6.2f} "
+                f"{statistics.mean(coverage[name]):8.2f} "
+                f"{statistics.mean(deviations[name]):9.2f} "
+                f"{max(deviations[name]):9.2f}"
+            )
+        self.stdout.write("откл. — |оригинальность − эталон| в п.п.; "
+                          "доля — запросов относительно эталона; "
+                          "покрытие — доля фрагментов, которые было "
+                          "с чем сравнить (кэш эталона или локальный "
+                          "индекс)")
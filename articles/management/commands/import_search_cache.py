@@ -0,0 +1,29 @@
+# articles/management/commands/import_search_cache.py
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from articles import cache_utils
+
+
+class Command(BaseCommand):
+    help = "Импортирует старый JSON-кэш поиска Google в SQLite-хранилище"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "json_path", nargs="?", default="google_search_cache.json",
+            help="Путь к JSON-файлу кэша (по умолчанию "
+                 "google_search_cache.json)",
+        )
+
+    def handle(self, *args, **options):
+        json_path = options["json_path"]
+        if not os.path.exists(json_path):
+            raise CommandError(f"Файл {json_path} не найден")
+
+        imported = cache_utils.import_json_cache(json_path)
+        removed = cache_utils.purge_cache()
+        self.stdout.write(self.style.SUCCESS(
+            f"Импортировано записей: {imported}, "
+            f"удалено просроченных: {removed} → {cache_utils.CACHE_DB}"
+        ))
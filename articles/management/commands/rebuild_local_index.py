@@ -0,0 +1,22 @@
+# articles/management/commands/rebuild_local_index.py
+from django.core.management.base import BaseCommand
+
+from articles.local_index import index_report
+from articles.models import Report
+
+
+class Command(BaseCommand):
+    help = ("Пересобирает MinHash/LSH-индекс фрагментов "
+            "для всех загруженных докладов")
+
+    def handle(self, *args, **options):
+        reports = Report.objects.only("id", "content").iterator()
+        total_reports = 0
+        total_bands = 0
+        for report in reports:
+            total_bands += index_report(report)
+            total_reports += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Проиндексировано докладов: {total_reports}, "
+            f"корзин: {total_bands}"
+        ))
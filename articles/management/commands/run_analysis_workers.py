@@ -0,0 +1,77 @@
+# articles/management/commands/run_analysis_workers.py
+import multiprocessing
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def worker_loop(poll_interval):
+    """
+    Цикл одного процесса-воркера: забирает задачи из очереди,
+    а когда очередь пуста — ждёт poll_interval секунд.
+    """
+    # При старте через spawn/forkserver Django нужно инициализировать заново
+    django.setup()
+    # Соединения родителя нельзя использовать в дочернем процессе
+    connections.close_all()
+
+    from articles.ai_detection import warmup
+    from articles.jobs import process_next_job, recover_stale_jobs
+
+    # Модель нужна каждому воркеру — грузим до первой задачи
+    warmup()
+    # Задачи воркеров, убитых при прошлом запуске, возвращаем в очередь
+    recover_stale_jobs()
+
+    try:
+        while True:
+            if not process_next_job():
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Запускает пул процессов, выполняющих анализ докладов из очереди"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=2,
+            help="Количество процессов-воркеров (по умолчанию 2)",
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=1.0,
+            help="Пауза между опросами пустой очереди, сек.",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        poll_interval = options["poll_interval"]
+
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=worker_loop, args=(poll_interval,),
+                name=f"analysis-worker-{i}",
+            )
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(self.style.SUCCESS(
+            f"Запущено воркеров анализа: {workers}"
+        ))
+
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Остановка воркеров...")
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
@@ -0,0 +1,67 @@
+# articles/management/commands/run_benchmarks.py
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.suite import GROUPS, compare, run_suite
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks" / "baseline.json"
+
+
+class Command(BaseCommand):
+    help = ("Микробенчмарки горячих путей анализа с сохранением в JSON "
+            "и сравнением с эталоном")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--groups", nargs="+", choices=list(GROUPS),
+                            default=list(GROUPS))
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--output", default="bench_results.json",
+                            help="Куда сохранить результаты")
+        parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+        parser.add_argument("--threshold", type=float, default=0.2,
+                            help="Допустимый рост медианы (0.2 = +20 %%)")
+        parser.add_argument("--save-baseline", action="store_true",
+                            help="Записать результаты как новый эталон")
+
+    def handle(self, *args, **options):
+        current = run_suite(options["groups"], options["repeat"],
+                            log=self.stdout.write)
+        Path(options["output"]).write_text(
+            json.dumps(current, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+
+        baseline_path = Path(options["baseline"])
+        if options["save_baseline"]:
+            baseline_path.write_text(
+                json.dumps(current, ensure_ascii=False, indent=2),
+                encoding="utf-8",
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"Эталон сохранён: {baseline_path}"
+            ))
+            return
+        if not baseline_path.exists():
+            self.stdout.write(f"Эталон {baseline_path} не найден; "
+                              f"сохраните его флагом --save-baseline")
+            return
+
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        rows = compare(current, baseline, options["threshold"])
+        self.stdout.write(f"\n{'случай':<32} {'эталон,мс':>10} "
+                          f"{'сейчас,мс':>10} {'изм.':>8}")
+        for name, base, now, change, regressed in rows:
+            line = (f"{name:<32} {base * 1000:10.2f} {now * 1000:10.2f} "
+                    f"{change:+8.1%}")
+            self.stdout.write(self.style.ERROR(line) if regressed else line)
+
+        regressions = [row[0] for row in rows if row[4]]
+        if regressions:
+            raise CommandError(
+                f"Регрессия больше {options['threshold']:.0%}: "
+                f"{', '.join(regressions)}"
+            )
+        self.stdout.write(self.style.SUCCESS("Регрессий нет"))
@@ -0,0 +1,48 @@
+# articles/management/commands/run_search_stub.py
+from django.core.management.base import BaseCommand
+
+from articles.search_stub import SearchCorpus, StubSearchServer
+
+
+class Command(BaseCommand):
+    help = ("Запускает локальную замену Google Custom Search "
+            "для нагрузочных тестов (ответы из корпуса-фикстуры)")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--corpus", default=None,
+                            help="JSON-список {title, url, text}; по "
+                                 "умолчанию articles/fixtures/"
+                                 "search_corpus.json")
+        parser.add_argument("--latency-ms", type=float, default=50)
+        parser.add_argument("--jitter-ms", type=float, default=0)
+        parser.add_argument("--error-rate", type=float, default=0.0,
+                            help="Доля ответов 503")
+        parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                            help="Доля ответов 429")
+        parser.add_argument("--retry-after", type=int, default=1)
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        server = StubSearchServer(
+            (options["host"], options["port"]),
+            SearchCorpus.load(options["corpus"]),
+            latency_ms=options["latency_ms"],
+            jitter_ms=options["jitter_ms"],
+            error_rate=options["error_rate"],
+            rate_limit_rate=options["rate_limit_rate"],
+            retry_after=options["retry_after"],
+            seed=options["seed"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Сервер поиска запущен: {server.url}\n"
+            f"Для проверки задайте SEARCH_API_URL={server.url}"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Ответы по статусам: {dict(server.counts)}")
@@ -0,0 +1,20 @@
+# articles/management/commands/warmup_models.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from articles.ai_detection import MODEL_NAME, is_ready, warmup
+
+
+class Command(BaseCommand):
+    help = ("Загружает модель ИИ-детекции (и скачивает её в кэш "
+            "Hugging Face, если её там ещё нет)")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        warmup()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Модель {MODEL_NAME} готова: {is_ready()} "
+            f"({elapsed:.1f} сек.)"
+        ))
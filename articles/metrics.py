@@ -0,0 +1,200 @@
+# articles/metrics.py
+"""
+Замеры этапов анализа и экспорт метрик в текстовом формате Prometheus.
+
+StageTimer собирает длительности этапов одного прогона; analyze_report_logic
+сохраняет их в AnalysisJob.stats["timings"]. Анализ выполняют отдельные
+процессы-воркеры, поэтому после каждого успешного прогона record_run
+прибавляет его к агрегатам в БД (StageMetric, RunCounter): /metrics
+читает несколько строк, не зависит от того, какой веб-процесс ответил,
+и счётчики не уменьшаются при удалении задач.
+Извлечение текста PDF выполняется в веб-процессе при загрузке — его
+гистограмма и счётчики кэшей относятся к процессу, отдавшему /metrics.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# Границы корзин гистограмм, сек.
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Счётчики прогона из AnalysisJob.stats, которые суммируются в RunCounter
+RUN_COUNTERS = ("fragments", "reused", "local_matches", "search_calls",
+                "search_calls_saved", "cache_hits", "cache_misses",
+                "ai_chunks")
+
+
+class StageTimer:
+    """
+    Длительности этапов одного прогона: {этап: секунды}. Повторный
+    span с тем же именем прибавляется к уже замеренному времени.
+    """
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[stage] = round(
+                self.timings.get(stage, 0.0) + elapsed, 4
+            )
+
+
+def _add_to_buckets(counts, buckets, value):
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            counts[i] += 1
+
+
+class Histogram:
+    """
+    Гистограмма в памяти процесса (потокобезопасная).
+    """
+
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def observe(self, value):
+        with self._lock:
+            self._sum += value
+            self._count += 1
+            _add_to_buckets(self._counts, self.buckets, value)
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * len(self.buckets)
+            self._sum = 0.0
+            self._count = 0
+
+    def snapshot(self):
+        """
+        (накопленные счётчики по корзинам, сумма, число наблюдений).
+        """
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+
+pdf_extract_seconds = Histogram()
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def _format_histogram(lines, name, buckets, counts, total, count,
+                      labels=None):
+    labels = labels or {}
+    for bound, value in zip(buckets, counts):
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} "
+                     f"{value}")
+    lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} "
+                 f"{count}")
+    lines.append(f"{name}_sum{_labels(labels)} {total:.4f}")
+    lines.append(f"{name}_count{_labels(labels)} {count}")
+
+
+def record_run(stats, buckets=STAGE_BUCKETS):
+    """
+    Прибавляет завершённый прогон (AnalysisJob.stats) к агрегатам в БД:
+    гистограммам этапов StageMetric и суммам RUN_COUNTERS в RunCounter.
+    """
+    from django.db import transaction
+    from django.db.models import F
+
+    from .models import RunCounter, StageMetric
+
+    with transaction.atomic():
+        # Строки блокируются в одном порядке, чтобы воркеры не ждали
+        # друг друга по кругу
+        for stage, seconds in sorted((stats.get("timings") or {}).items()):
+            StageMetric.objects.get_or_create(
+                stage=stage, defaults={"bucket_counts": [0] * len(buckets)}
+            )
+            metric = StageMetric.objects.select_for_update().get(stage=stage)
+            if len(metric.bucket_counts) != len(buckets):
+                # Границы корзин поменялись — старые счётчики несравнимы
+                metric.bucket_counts = [0] * len(buckets)
+                metric.total_seconds = 0.0
+                metric.count = 0
+            _add_to_buckets(metric.bucket_counts, buckets, seconds)
+            metric.total_seconds += seconds
+            metric.count += 1
+            metric.save()
+        for name in RUN_COUNTERS:
+            value = stats.get(name, 0)
+            if not value:
+                continue
+            RunCounter.objects.get_or_create(name=name)
+            RunCounter.objects.filter(name=name).update(
+                value=F("value") + value
+            )
+
+
+def render_metrics():
+    """
+    Все метрики в текстовом формате Prometheus (version 0.0.4).
+    """
+    from django.db.models import Count
+
+    from .decorators import cache_stats
+    from .models import AnalysisJob, RunCounter, StageMetric
+    from .pdf_extraction import pdf_cache_stats
+
+    lines = []
+
+    lines.append("# HELP prooftext_analysis_jobs Задачи анализа по статусам")
+    lines.append("# TYPE prooftext_analysis_jobs gauge")
+    by_status = dict(
+        AnalysisJob.objects.values_list("status")
+        .annotate(n=Count("id")).order_by()
+    )
+    for status, _ in AnalysisJob.STATUS_CHOICES:
+        lines.append(f'prooftext_analysis_jobs{{status="{status}"}} '
+                     f"{by_status.get(status, 0)}")
+
+    name = "prooftext_analysis_stage_seconds"
+    lines.append(f"# HELP {name} Длительность этапов анализа доклада")
+    lines.append(f"# TYPE {name} histogram")
+    for metric in StageMetric.objects.order_by("stage"):
+        _format_histogram(lines, name, STAGE_BUCKETS, metric.bucket_counts,
+                          metric.total_seconds, metric.count,
+                          {"stage": metric.stage})
+
+    counters = dict(RunCounter.objects.values_list("name", "value"))
+    for counter in RUN_COUNTERS:
+        name = f"prooftext_analysis_{counter}_total"
+        lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name} {counters.get(counter, 0)}")
+
+    name = "prooftext_pdf_extract_seconds"
+    counts, total, count = pdf_extract_seconds.snapshot()
+    lines.append(f"# HELP {name} Извлечение текста PDF в этом процессе")
+    lines.append(f"# TYPE {name} histogram")
+    _format_histogram(lines, name, STAGE_BUCKETS, counts, total, count)
+
+    for cache, stats in (("search", cache_stats), ("pdf", pdf_cache_stats)):
+        for field, value in stats.as_dict().items():
+            if field == "hit_rate":
+                continue
+            name = f"prooftext_{cache}_cache_{field}_total"
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-17 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0007_analysisjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportFragmentBand",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fragment_index", models.PositiveIntegerField()),
+                ("band_key", models.BigIntegerField(db_index=True)),
+                (
+                    "report",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fragment_bands",
+                        to="articles.report",
+                    ),
+                ),
+            ],
+        ),
+    ]
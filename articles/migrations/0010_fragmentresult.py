@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-17 13:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0009_report_file_sha256_extractedpdftext"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FragmentResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fragment_hash", models.CharField(max_length=64)),
+                ("best_score", models.FloatField(default=0.0)),
+                ("match", models.JSONField(blank=True, null=True)),
+                ("checked_at", models.DateTimeField(auto_now=True)),
+                (
+                    "report",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fragment_results",
+                        to="articles.report",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("report", "fragment_hash"),
+                        name="unique_report_fragment_hash",
+                    )
+                ],
+            },
+        ),
+    ]
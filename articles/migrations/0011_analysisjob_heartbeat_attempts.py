@@ -0,0 +1,50 @@
+# Generated by Django 5.2.3 on 2026-10-17 21:10
+
+from django.db import migrations, models
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    # До ограничения уникальности на доклад могли создаться
+    # две незавершённые задачи — оставляем самую свежую
+    AnalysisJob = apps.get_model("articles", "AnalysisJob")
+    seen = set()
+    active = AnalysisJob.objects.filter(
+        status__in=["queued", "running"]
+    ).order_by("report_id", "-created_at")
+    for job in active:
+        if job.report_id in seen:
+            job.status = "failed"
+            job.error = "Дубликат незавершённой задачи"
+            job.save(update_fields=["status", "error"])
+        else:
+            seen.add(job.report_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0010_fragmentresult"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analysisjob",
+            name="heartbeat_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="analysisjob",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(fail_duplicate_active_jobs,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="analysisjob",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(status__in=["queued", "running"]),
+                fields=("report",),
+                name="unique_active_analysis_job",
+            ),
+        ),
+    ]
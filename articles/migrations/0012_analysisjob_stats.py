@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 21:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0011_analysisjob_heartbeat_attempts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analysisjob",
+            name="stats",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-17 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0012_analysisjob_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="certificate",
+            field=models.FileField(blank=True, null=True,
+                                   upload_to="certificates/"),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="certificate_version",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="certificate_rendered_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
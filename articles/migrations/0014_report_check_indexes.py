@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-17 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0013_report_certificate"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="report",
+            index=models.Index(fields=["status", "created_at"],
+                               name="articles_report_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="report",
+            index=models.Index(fields=["created_at"],
+                               name="articles_report_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="plagiarismcheck",
+            index=models.Index(fields=["checked_at"],
+                               name="articles_check_checked_idx"),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.3 on 2026-10-18 00:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_job_details(apps, schema_editor):
+    # Совпадения завершённых задач переносятся из AnalysisJob.details
+    # в проверки с построчными совпадениями
+    AnalysisJob = apps.get_model("articles", "AnalysisJob")
+    PlagiarismCheck = apps.get_model("articles", "PlagiarismCheck")
+    PlagiarismMatch = apps.get_model("articles", "PlagiarismMatch")
+    jobs = (AnalysisJob.objects.filter(status="done")
+            .exclude(details=[]).select_related("report"))
+    for job in jobs.iterator():
+        check = PlagiarismCheck.objects.create(
+            report=job.report, job=job,
+            originality_percent=job.report.originality_percent or 0,
+        )
+        PlagiarismMatch.objects.bulk_create(
+            [
+                PlagiarismMatch(
+                    plagiarism_check=check, position=position,
+                    fragment=match.get("fragment", ""),
+                    similarity_percent=match.get("similarity_percent", 0),
+                    url=match.get("url", ""),
+                    title=match.get("title", ""),
+                    snippet=match.get("snippet", ""),
+                )
+                for position, match in enumerate(job.details)
+            ],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0015_report_author_created_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="plagiarismcheck",
+            name="job",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="checks",
+                to="articles.analysisjob",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="plagiarismcheck",
+            index=models.Index(fields=["report", "checked_at"],
+                               name="articles_check_report_idx"),
+        ),
+        migrations.CreateModel(
+            name="PlagiarismMatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("position", models.PositiveIntegerField()),
+                ("fragment", models.TextField()),
+                ("similarity_percent", models.FloatField()),
+                ("url", models.CharField(max_length=2048)),
+                ("title", models.TextField(blank=True)),
+                ("snippet", models.TextField(blank=True)),
+                (
+                    "plagiarism_check",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="matches",
+                        to="articles.plagiarismcheck",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["position"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("plagiarism_check", "position"),
+                        name="unique_match_position",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(move_job_details, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="analysisjob",
+            name="details",
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.3 on 2026-10-18 00:50
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def fill_content_hash(apps, schema_editor):
+    # Та же нормализация, что в articles.models.normalized_text_hash
+    Report = apps.get_model("articles", "Report")
+    batch = []
+    for report in Report.objects.only("id", "content").iterator():
+        normalized = " ".join(report.content.lower().split())
+        report.content_hash = hashlib.sha256(
+            normalized.encode("utf-8")
+        ).hexdigest()
+        batch.append(report)
+        if len(batch) >= 500:
+            Report.objects.bulk_update(batch, ["content_hash"])
+            batch = []
+    Report.objects.bulk_update(batch, ["content_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0016_plagiarismmatch"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="content_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.RunPython(fill_content_hash, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name="plagiarismcheck",
+            name="ai_generated_percent",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="plagiarismcheck",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="plagiarismcheck",
+            name="config_version",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name="plagiarismcheck",
+            index=models.Index(fields=["content_hash", "config_version"],
+                               name="articles_check_content_idx"),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.3 on 2026-10-18 01:20
+
+from django.db import migrations
+
+# Индекс полнотекстового поиска (см. articles/fulltext.py). Столбец
+# и таблица не описаны в модели Report: их поддерживает сама БД.
+# В SQLite Django меняет схему пересозданием таблицы, при этом триггеры
+# пропадают — после migrate их восстанавливает обработчик post_migrate
+# (articles.fulltext.ensure_sqlite_triggers)
+
+PG_FORWARD = [
+    """
+    ALTER TABLE articles_report ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('russian', coalesce(content, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX articles_report_search_idx ON articles_report "
+    "USING GIN (search_vector)",
+]
+PG_BACKWARD = [
+    "DROP INDEX IF EXISTS articles_report_search_idx",
+    "ALTER TABLE articles_report DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE articles_report_fts USING fts5(
+        title, content,
+        content='articles_report', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER articles_report_fts_insert AFTER INSERT ON articles_report
+    BEGIN
+        INSERT INTO articles_report_fts (rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER articles_report_fts_delete AFTER DELETE ON articles_report
+    BEGIN
+        INSERT INTO articles_report_fts (articles_report_fts, rowid,
+                                         title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER articles_report_fts_update
+    AFTER UPDATE OF title, content ON articles_report
+    BEGIN
+        INSERT INTO articles_report_fts (articles_report_fts, rowid,
+                                         title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO articles_report_fts (rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    "INSERT INTO articles_report_fts (articles_report_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS articles_report_fts_insert",
+    "DROP TRIGGER IF EXISTS articles_report_fts_delete",
+    "DROP TRIGGER IF EXISTS articles_report_fts_update",
+    "DROP TABLE IF EXISTS articles_report_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        statements = statements_by_vendor.get(
+            schema_editor.connection.vendor, []
+        )
+        for sql in statements:
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0017_report_content_hash"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"postgresql": PG_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": PG_BACKWARD, "sqlite": SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0018_report_fulltext"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="plagiarismcheck",
+            name="coverage",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
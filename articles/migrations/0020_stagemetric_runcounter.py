@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-18 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0019_plagiarismcheck_coverage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RunCounter",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True,
+                                           primary_key=True,
+                                           serialize=False,
+                                           verbose_name="ID")),
+                ("name", models.CharField(max_length=32, unique=True)),
+                ("value", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="StageMetric",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True,
+                                           primary_key=True,
+                                           serialize=False,
+                                           verbose_name="ID")),
+                ("stage", models.CharField(max_length=32, unique=True)),
+                ("bucket_counts", models.JSONField(default=list)),
+                ("total_seconds", models.FloatField(default=0.0)),
+                ("count", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("articles", "0020_stagemetric_runcounter"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="extractedpdftext",
+            name="max_pages",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="extractedpdftext",
+            name="max_chars",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
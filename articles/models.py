@@ -1,9 +1,19 @@
 # articles/models.py
+import hashlib
+
 from django.db import models
 
 from users.models import CustomUser
 
 
+def normalized_text_hash(text):
+    """
+    SHA-256 текста без учёта регистра и пробельных символов.
+    """
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
 class Report(models.Model):
     STATUS_CHOICES = [
         ("draft", "Черновик"),
@@ -17,6 +27,11 @@ class Report(models.Model):
     file = models.FileField(
         upload_to="reports_files/", blank=True, null=True
     )  # <-- заменили file_path на FileField
+    file_sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    # Хэш нормализованного текста: одинаковый текст не анализируется
+    # повторно (см. articles.jobs.reuse_previous_check)
+    content_hash = models.CharField(max_length=64, blank=True,
+                                    db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20,
                               choices=STATUS_CHOICES, default="draft")
@@ -24,15 +39,230 @@ class Report(models.Model):
     ai_generated_percent = models.FloatField(null=True, blank=True)
     originality_percent = models.FloatField(null=True, blank=True)
 
+    # Готовая PDF-справка; certificate_version — хэш напечатанных в ней
+    # полей, при его расхождении справка рендерится заново
+    certificate = models.FileField(upload_to="certificates/",
+                                   blank=True, null=True)
+    certificate_version = models.CharField(max_length=64, blank=True)
+    certificate_rendered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Фильтры и курсорная пагинация API
+            models.Index(fields=["status", "created_at"],
+                         name="articles_report_status_idx"),
+            models.Index(fields=["created_at"],
+                         name="articles_report_created_idx"),
+            # Списки докладов автора: filter(author=...)
+            # .order_by("-created_at")
+            models.Index(fields=["author", "created_at"],
+                         name="articles_report_author_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.content_hash = normalized_text_hash(self.content)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "content" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "content_hash"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.title} ({self.author.email})"
 
 
 class PlagiarismCheck(models.Model):
     report = models.ForeignKey(Report, on_delete=models.CASCADE)
+    # Задача анализа, создавшая проверку (у старых проверок нет)
+    job = models.ForeignKey("AnalysisJob", on_delete=models.SET_NULL,
+                            null=True, blank=True, related_name="checks")
     originality_percent = models.DecimalField(max_digits=5, decimal_places=2)
+    ai_generated_percent = models.FloatField(null=True, blank=True)
     checked_at = models.DateTimeField(auto_now_add=True)
     certificate_url = models.TextField(blank=True)
+    # Что проверялось и чем: хэш текста и версия настроек анализа
+    # (analysis_config_version) — по ним результат переиспользуется
+    content_hash = models.CharField(max_length=64, blank=True)
+    config_version = models.CharField(max_length=64, blank=True)
+    # Доля фрагментов, проверенных поиском; переиспользуются только
+    # проверки с полным покрытием (у старых проверок не заполнено)
+    coverage = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["checked_at"],
+                         name="articles_check_checked_idx"),
+            # Последняя проверка доклада
+            models.Index(fields=["report", "checked_at"],
+                         name="articles_check_report_idx"),
+            models.Index(fields=["content_hash", "config_version"],
+                         name="articles_check_content_idx"),
+        ]
 
     def __str__(self):
         return f"Check for '{self.report.title}' – {self.originality_percent}%"
+
+
+class PlagiarismMatch(models.Model):
+    """
+    Совпадение фрагмента доклада с источником, найденное проверкой.
+    position — порядок фрагмента в тексте, по нему идёт постраничный
+    просмотр.
+    """
+
+    plagiarism_check = models.ForeignKey(PlagiarismCheck,
+                                         on_delete=models.CASCADE,
+                                         related_name="matches")
+    position = models.PositiveIntegerField()
+    fragment = models.TextField()
+    similarity_percent = models.FloatField()
+    url = models.CharField(max_length=2048)
+    title = models.TextField(blank=True)
+    snippet = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["position"]
+        constraints = [
+            models.UniqueConstraint(fields=["plagiarism_check", "position"],
+                                    name="unique_match_position"),
+        ]
+
+    def __str__(self):
+        return f"{self.similarity_percent}% – {self.url}"
+
+
+class FragmentResult(models.Model):
+    """
+    Результат проверки одного фрагмента доклада. При повторном анализе
+    фрагменты с тем же нормализованным хэшем не отправляются в поиск.
+    """
+
+    report = models.ForeignKey(Report, on_delete=models.CASCADE,
+                               related_name="fragment_results")
+    fragment_hash = models.CharField(max_length=64)
+    best_score = models.FloatField(default=0.0)
+    match = models.JSONField(null=True, blank=True)
+    checked_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["report", "fragment_hash"],
+                                    name="unique_report_fragment_hash")
+        ]
+
+    def __str__(self):
+        return (f"Fragment {self.fragment_hash[:12]}… of report "
+                f"#{self.report_id} – {self.best_score}%")
+
+
+class ExtractedPdfText(models.Model):
+    """
+    Текст, извлечённый из PDF, по SHA-256 содержимого файла.
+    Повторная загрузка того же файла не требует разбора PDF.
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    text = models.TextField()
+    page_count = models.PositiveIntegerField(default=0)
+    pages_extracted = models.PositiveIntegerField(default=0)
+    truncated = models.BooleanField(default=False)
+    # Лимиты PDF_MAX_PAGES/PDF_MAX_CHARS, с которыми извлечён текст:
+    # обрезанный текст годится только при тех же лимитах
+    max_pages = models.PositiveIntegerField(null=True, blank=True)
+    max_chars = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"PDF {self.sha256[:12]}… ({self.page_count} стр.)"
+
+
+class ReportFragmentBand(models.Model):
+    """
+    LSH-корзина MinHash-подписи одного фрагмента доклада
+    (см. articles.local_index).
+    """
+
+    report = models.ForeignKey(Report, on_delete=models.CASCADE,
+                               related_name="fragment_bands")
+    fragment_index = models.PositiveIntegerField()
+    band_key = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"Band {self.band_key} of report #{self.report_id}"
+
+
+class StageMetric(models.Model):
+    """
+    Накопленная гистограмма длительности этапа анализа по всем
+    завершённым прогонам (см. articles.metrics.record_run).
+    bucket_counts — накопленные счётчики по metrics.STAGE_BUCKETS.
+    """
+
+    stage = models.CharField(max_length=32, unique=True)
+    bucket_counts = models.JSONField(default=list)
+    total_seconds = models.FloatField(default=0.0)
+    count = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.stage}: {self.count} прогонов"
+
+
+class RunCounter(models.Model):
+    """
+    Сумма счётчика прогона (metrics.RUN_COUNTERS) по всем завершённым
+    прогонам. Не уменьшается при удалении задач и докладов.
+    """
+
+    name = models.CharField(max_length=32, unique=True)
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+class AnalysisJob(models.Model):
+    STATUS_CHOICES = [
+        ("queued", "В очереди"),
+        ("running", "Выполняется"),
+        ("done", "Завершено"),
+        ("failed", "Ошибка"),
+    ]
+
+    report = models.ForeignKey(Report, on_delete=models.CASCADE,
+                               related_name="analysis_jobs")
+    status = models.CharField(max_length=20,
+                              choices=STATUS_CHOICES, default="queued")
+    progress = models.PositiveSmallIntegerField(default=0)  # 0–100 %
+    # Статистика прогона: фрагменты, переиспользованные результаты,
+    # запросы к поиску и сэкономленные запросы
+    stats = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Обновляется воркером во время анализа; задача без обновлений
+    # дольше ANALYSIS_JOB_STALE_SECONDS считается брошенной
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    ACTIVE_STATUSES = ("queued", "running")
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "created_at"],
+                                name="articles_job_status_idx")]
+        constraints = [
+            # Не больше одной незавершённой задачи на доклад
+            models.UniqueConstraint(
+                fields=["report"],
+                condition=models.Q(status__in=["queued", "running"]),
+                name="unique_active_analysis_job",
+            ),
+        ]
+
+    @property
+    def is_finished(self):
+        return self.status in ("done", "failed")
+
+    def __str__(self):
+        return (f"Job #{self.pk} for '{self.report.title}' – "
+                f"{self.status} ({self.progress}%)")
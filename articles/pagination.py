@@ -0,0 +1,68 @@
+# articles/pagination.py
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ReportCursorPagination(CursorPagination):
+    """
+    Курсор по (created_at, id): страница читается по индексу, без OFFSET,
+    и не сдвигается при добавлении новых докладов.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class CheckCursorPagination(ReportCursorPagination):
+    ordering = ("-checked_at", "-id")
+
+
+class SearchPagination(PageNumberPagination):
+    # Результаты упорядочены по релевантности, курсор по полю неприменим;
+    # глубоко листать поиск не принято
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+HTML_PAGE_SIZE = 20
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _encode_cursor(report):
+    micros = (report.created_at - _EPOCH) // timedelta(microseconds=1)
+    return f"{micros}-{report.pk}"
+
+
+def _decode_cursor(cursor):
+    try:
+        micros, pk = (int(part) for part in cursor.split("-"))
+    except (AttributeError, ValueError):
+        return None
+    return _EPOCH + timedelta(microseconds=micros), pk
+
+
+def keyset_page(queryset, cursor=None, page_size=HTML_PAGE_SIZE):
+    """
+    Страница докладов в порядке (-created_at, -id) после cursor.
+    Возвращает (доклады, курсор следующей страницы или None).
+    В отличие от OFFSET, стоимость не растёт с номером страницы;
+    некорректный курсор открывает первую страницу.
+    """
+    position = _decode_cursor(cursor) if cursor else None
+    if position is not None:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+        )
+    items = list(queryset.order_by("-created_at", "-id")[: page_size + 1])
+    if len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    return items, _encode_cursor(items[-1])
@@ -0,0 +1,229 @@
+# articles/pdf_extraction.py
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import fitz
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .decorators import CacheStats
+from .metrics import pdf_extract_seconds
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+pdf_cache_stats = CacheStats(("hits", "misses"))
+
+
+@dataclass
+class PdfExtractionResult:
+    text: str = ""
+    page_count: int = 0
+    pages_extracted: int = 0
+    # [(номер страницы с 1, текст ошибки)]; None — ошибка открытия файла
+    errors: list = field(default_factory=list)
+    truncated: bool = False
+
+
+def _source_path(pdf_file):
+    """
+    Путь к файлу на диске, если он есть: крупные загрузки Django хранит
+    во временном файле, сохранённые доклады — в MEDIA_ROOT.
+    """
+    for candidate in (pdf_file, getattr(pdf_file, "file", None)):
+        if candidate is None:
+            continue
+        if hasattr(candidate, "temporary_file_path"):
+            return candidate.temporary_file_path()
+    if getattr(pdf_file, "_committed", False):
+        try:
+            return pdf_file.path
+        except (NotImplementedError, ValueError):
+            return None
+    return None
+
+
+def _open_document(pdf_file):
+    path = _source_path(pdf_file)
+    if path is not None:
+        return fitz.open(path, filetype="pdf"), path
+    # Небольшие загрузки Django держит в памяти — читаем их как есть
+    pdf_file.seek(0)
+    return fitz.open(stream=pdf_file.read(), filetype="pdf"), None
+
+
+def iter_pages(doc, start=0, stop=None):
+    """
+    Постранично отдаёт (номер страницы с 1, текст, ошибка).
+    Ошибка одной страницы не прерывает обработку остальных.
+    """
+    stop = doc.page_count if stop is None else min(stop, doc.page_count)
+    for index in range(start, stop):
+        try:
+            yield index + 1, doc.load_page(index).get_text(), None
+        except Exception as e:
+            yield index + 1, "", str(e)
+
+
+def _extract_page_range(path, start, stop, max_chars):
+    # Выполняется в дочернем процессе: документ открывается заново
+    pages = []
+    chars = 0
+    with fitz.open(path, filetype="pdf") as doc:
+        for page_number, text, error in iter_pages(doc, start, stop):
+            pages.append((page_number, text, error))
+            chars += len(text)
+            if chars >= max_chars:
+                break
+    return pages
+
+
+def _iter_parallel(path, page_count, max_chars, workers):
+    chunk = -(-page_count // workers)
+    ranges = [(start, min(start + chunk, page_count))
+              for start in range(0, page_count, chunk)]
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=context) as executor:
+        # map сохраняет порядок диапазонов
+        for pages in executor.map(
+            _extract_page_range,
+            *zip(*[(path, a, b, max_chars) for a, b in ranges]),
+        ):
+            yield from pages
+
+
+def extract_pdf(pdf_file, max_pages=None, max_chars=None):
+    """
+    Извлекает текст PDF постранично, не склеивая строки в цикле.
+    Останавливается на max_pages страницах или max_chars символах.
+    Большие документы с файлом на диске делятся по диапазонам страниц
+    между процессами (PDF_WORKERS). Длительность попадает в гистограмму
+    pdf_extract_seconds.
+    """
+    with pdf_extract_seconds.time():
+        return _extract_pdf(pdf_file, max_pages, max_chars)
+
+
+def _extract_pdf(pdf_file, max_pages, max_chars):
+    max_pages = max_pages or settings.PDF_MAX_PAGES
+    max_chars = max_chars or settings.PDF_MAX_CHARS
+    result = PdfExtractionResult()
+
+    try:
+        doc, path = _open_document(pdf_file)
+    except Exception as e:
+        logger.error(f"[PDF ERROR] Не удалось открыть файл: {e}")
+        result.errors.append((None, str(e)))
+        return result
+
+    with doc:
+        result.page_count = doc.page_count
+        page_limit = min(doc.page_count, max_pages)
+        result.truncated = doc.page_count > page_limit
+
+        workers = min(settings.PDF_WORKERS,
+                      page_limit // settings.PDF_PARALLEL_MIN_PAGES)
+        if path is not None and workers > 1:
+            pages = _iter_parallel(path, page_limit, max_chars, workers)
+        else:
+            pages = iter_pages(doc, 0, page_limit)
+
+        parts = []
+        chars = 0
+        for page_number, text, error in pages:
+            if error is not None:
+                logger.warning(f"[PDF ERROR] Страница {page_number}: {error}")
+                result.errors.append((page_number, error))
+            if chars + len(text) > max_chars:
+                parts.append(text[: max_chars - chars])
+                result.pages_extracted += 1
+                result.truncated = True
+                break
+            parts.append(text)
+            chars += len(text)
+            result.pages_extracted += 1
+
+    result.text = "".join(parts).strip()
+    return result
+
+
+def file_sha256(pdf_file):
+    """
+    SHA-256 содержимого файла. Загрузки, принятые обработчиками
+    articles.uploads, уже несут хэш, посчитанный при приёме; иначе
+    он вычисляется потоково по кускам.
+    """
+    for candidate in (pdf_file, getattr(pdf_file, "file", None)):
+        sha256 = getattr(candidate, "sha256", None)
+        if sha256:
+            return sha256
+    digest = hashlib.sha256()
+    pdf_file.seek(0)
+    if hasattr(pdf_file, "chunks"):
+        chunks = pdf_file.chunks(HASH_CHUNK_SIZE)
+    else:
+        chunks = iter(lambda: pdf_file.read(HASH_CHUNK_SIZE), b"")
+    for chunk in chunks:
+        digest.update(chunk)
+    pdf_file.seek(0)
+    return digest.hexdigest()
+
+
+def _cache_fits(cached, max_pages, max_chars):
+    if cached.truncated:
+        # Обрезанный текст: при других лимитах он был бы другим
+        return (cached.max_pages, cached.max_chars) == (max_pages, max_chars)
+    return (cached.page_count <= max_pages
+            and len(cached.text) <= max_chars)
+
+
+def extract_pdf_cached(pdf_file):
+    """
+    Как extract_pdf, но сначала ищет текст по SHA-256 файла
+    в ExtractedPdfText. Запись используется, если текст извлечён
+    полностью в пределах текущих лимитов или обрезан с теми же
+    лимитами. Возвращает (результат, sha256).
+    """
+    # Модуль импортируется и в процессах-воркерах без настроенного Django,
+    # поэтому модель подключается только здесь
+    from .models import ExtractedPdfText
+
+    max_pages, max_chars = settings.PDF_MAX_PAGES, settings.PDF_MAX_CHARS
+    sha256 = file_sha256(pdf_file)
+    cached = ExtractedPdfText.objects.filter(sha256=sha256).first()
+    if cached is not None and _cache_fits(cached, max_pages, max_chars):
+        pdf_cache_stats.incr("hits")
+        return PdfExtractionResult(
+            text=cached.text,
+            page_count=cached.page_count,
+            pages_extracted=cached.pages_extracted,
+            truncated=cached.truncated,
+        ), sha256
+
+    pdf_cache_stats.incr("misses")
+    result = extract_pdf(pdf_file, max_pages=max_pages, max_chars=max_chars)
+    # Кэшируем только полностью прочитанные файлы: ошибку страницы
+    # стоит попробовать исправить при следующей загрузке
+    if result.text and not result.errors:
+        try:
+            with transaction.atomic():
+                # Запись, извлечённая с другими лимитами, заменяется
+                ExtractedPdfText.objects.update_or_create(
+                    sha256=sha256,
+                    defaults={
+                        "text": result.text,
+                        "page_count": result.page_count,
+                        "pages_extracted": result.pages_extracted,
+                        "truncated": result.truncated,
+                        "max_pages": max_pages,
+                        "max_chars": max_chars,
+                    },
+                )
+        except IntegrityError:
+            pass  # тот же файл параллельно сохранил другой запрос
+    return result, sha256
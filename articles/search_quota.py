@@ -0,0 +1,176 @@
+# articles/search_quota.py
+"""
+Общий для всех процессов лимит запросов к внешнему поиску.
+
+Токен-бакет (SEARCH_QPS запросов в секунду) и дневной счётчик запросов
+(SEARCH_DAILY_QUOTA) хранятся в той же SQLite-базе, что и кэш поиска
+(таблицы search_bucket и search_quota_usage).
+Каждое списание выполняется в транзакции BEGIN IMMEDIATE, поэтому
+воркеры gunicorn и воркеры анализа делят один бакет и одну квоту.
+"""
+import random
+import threading
+from datetime import datetime
+from time import sleep, time
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+
+from .cache_utils import get_connection
+from .decorators import SearchError
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_bucket (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_quota_usage (
+    day TEXT PRIMARY KEY,
+    used INTEGER NOT NULL
+);
+"""
+
+_local = threading.local()
+
+
+def get_quota_connection():
+    """
+    Соединение с базой кэша поиска, в которой созданы таблицы лимита.
+    Схема создаётся один раз для каждого соединения потока.
+    """
+    conn = get_connection()
+    if getattr(_local, "conn", None) is not conn:
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+class QuotaExceededError(SearchError):
+    """
+    Дневная квота запросов исчерпана. Повтор до смены суток
+    бессмыслен, поэтому анализ доклада должен завершиться ошибкой,
+    а не молча засчитать фрагменты как непроверенные.
+    """
+
+
+class SearchScheduler:
+    """
+    Токен-бакет на SEARCH_QPS запросов в секунду (с запасом на всплеск
+    до одной секунды) плюс дневная квота. Состояние общее для всех
+    экземпляров с тем же name во всех процессах.
+    """
+
+    def __init__(self, name, qps, daily_quota, timezone="UTC"):
+        self.name = name
+        self.qps = qps
+        self.burst = max(1.0, qps)
+        self.daily_quota = daily_quota
+        self.timezone = ZoneInfo(timezone)
+
+    def today(self):
+        # Квота Google сбрасывается в полночь по тихоокеанскому времени
+        return datetime.now(self.timezone).date().isoformat()
+
+    def _try_acquire(self, conn):
+        """
+        Пытается списать токен. Возвращает 0, если запрос разрешён,
+        иначе — сколько секунд подождать до появления токена.
+        """
+        now = time()
+        day = self.today()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT used FROM search_quota_usage WHERE day = ?", (day,)
+            ).fetchone()
+            used = row[0] if row else 0
+            if self.daily_quota and used >= self.daily_quota:
+                raise QuotaExceededError(
+                    f"Исчерпана дневная квота поиска ({self.daily_quota} "
+                    f"запросов за {day}); повторите проверку завтра"
+                )
+
+            wait = 0.0
+            # SEARCH_QPS=0 отключает ограничение скорости, но не квоту
+            if self.qps:
+                row = conn.execute(
+                    "SELECT tokens, updated_at FROM search_bucket "
+                    "WHERE name = ?", (self.name,)
+                ).fetchone()
+                tokens, updated_at = row if row else (self.burst, now)
+                tokens = min(self.burst,
+                             tokens + max(0.0, now - updated_at) * self.qps)
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.qps
+                conn.execute(
+                    "INSERT INTO search_bucket (name, tokens, updated_at) "
+                    "VALUES (?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET tokens = "
+                    "excluded.tokens, updated_at = excluded.updated_at",
+                    (self.name, tokens, now),
+                )
+            if wait == 0:
+                conn.execute(
+                    "INSERT INTO search_quota_usage (day, used) "
+                    "VALUES (?, 1) "
+                    "ON CONFLICT(day) DO UPDATE SET used = used + 1",
+                    (day,),
+                )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return wait
+
+    def acquire(self, timeout=None):
+        """
+        Ждёт свободный токен и засчитывает запрос в дневную квоту.
+        Выбрасывает QuotaExceededError, если квота исчерпана,
+        и SearchError, если токен не освободился за timeout секунд.
+        """
+        conn = get_quota_connection()
+        deadline = None if timeout is None else time() + timeout
+        while True:
+            wait = self._try_acquire(conn)
+            if wait == 0:
+                return
+            if deadline is not None and time() + wait > deadline:
+                raise SearchError("Не дождались очереди к поиску "
+                                  f"за {timeout} сек.")
+            sleep(wait)
+
+    def usage(self):
+        """
+        {"day", "used", "quota", "remaining"} за текущие сутки.
+        """
+        day = self.today()
+        row = get_quota_connection().execute(
+            "SELECT used FROM search_quota_usage WHERE day = ?", (day,)
+        ).fetchone()
+        used = row[0] if row else 0
+        remaining = (max(0, self.daily_quota - used)
+                     if self.daily_quota else None)
+        return {"day": day, "used": used, "quota": self.daily_quota,
+                "remaining": remaining}
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """
+    Экспоненциальная задержка с полным джиттером:
+    случайное число от 0 до min(cap, base * 2 ** attempt).
+    """
+    base = settings.SEARCH_BACKOFF_BASE if base is None else base
+    cap = settings.SEARCH_BACKOFF_MAX if cap is None else cap
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def get_scheduler():
+    return SearchScheduler(
+        "google",
+        qps=settings.SEARCH_QPS,
+        daily_quota=settings.SEARCH_DAILY_QUOTA,
+        timezone=settings.SEARCH_QUOTA_TIMEZONE,
+    )
@@ -0,0 +1,182 @@
+# articles/search_stub.py
+"""
+Локальная замена Google Custom Search для нагрузочных тестов.
+
+SearchCorpus ищет запрос в небольшом корпусе документов (JSON-список
+{"title", "url", "text"}) и возвращает сниппет — самое похожее на запрос
+окно текста. StubSearchServer отдаёт эти результаты по HTTP в формате
+Google ({"items": [{"title", "link", "snippet"}]}) с настраиваемой
+задержкой и долей ошибок 429/5xx, поэтому путь запроса (повторы, пул
+соединений, параллельный поиск) проверяется без сети и без расхода
+квоты Google.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORPUS = Path(__file__).parent / "fixtures" / "search_corpus.json"
+STUB_PATH = "/customsearch/v1"
+
+
+def _words(text):
+    return text.lower().split()
+
+
+class SearchCorpus:
+    def __init__(self, documents):
+        self.documents = documents
+        self._tokens = [_words(doc["text"]) for doc in documents]
+        self._index = defaultdict(set)
+        for doc_id, tokens in enumerate(self._tokens):
+            for token in tokens:
+                self._index[token].add(doc_id)
+
+    @classmethod
+    def load(cls, path=None):
+        with open(path or DEFAULT_CORPUS, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _snippet(self, doc_id, query_words):
+        # Окно длины запроса с наибольшим числом общих слов; при равенстве
+        # — с наибольшим числом слов на тех же позициях, что в запросе
+        tokens = self._tokens[doc_id]
+        words = self.documents[doc_id]["text"].split()
+        size = len(query_words)
+        wanted = set(query_words)
+        best_start, best_score = 0, (-1, -1)
+        for start in range(0, max(1, len(tokens) - size + 1)):
+            window = tokens[start: start + size]
+            score = (
+                len(wanted.intersection(window)),
+                sum(1 for a, b in zip(window, query_words) if a == b),
+            )
+            if score > best_score:
+                best_start, best_score = start, score
+        return " ".join(words[best_start: best_start + size])
+
+    def search(self, query, num=5):
+        query_words = _words(query)
+        scores = Counter()
+        for token in set(query_words):
+            for doc_id in self._index.get(token, ()):
+                scores[doc_id] += 1
+        return [
+            {
+                "title": self.documents[doc_id]["title"],
+                "url": self.documents[doc_id]["url"],
+                "snippet": self._snippet(doc_id, query_words),
+            }
+            for doc_id, _ in scores.most_common(num)
+        ]
+
+
+class StubSearchServer(ThreadingHTTPServer):
+    """
+    HTTP-сервер в формате Google Custom Search.
+
+    latency_ms ± jitter_ms — задержка каждого ответа; error_rate — доля
+    ответов 503, rate_limit_rate — доля ответов 429 с Retry-After.
+    seed делает последовательность ошибок воспроизводимой.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, corpus, latency_ms=0, jitter_ms=0,
+                 error_rate=0.0, rate_limit_rate=0.0, retry_after=1,
+                 seed=None):
+        super().__init__(address, StubSearchHandler)
+        self.corpus = corpus
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = Counter()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{STUB_PATH}"
+
+    def next_outcome(self):
+        """
+        (HTTP-статус, задержка в секундах) для очередного запроса.
+        """
+        with self._lock:
+            roll = self._random.random()
+            delay = max(0.0, self.latency_ms + self._random.uniform(
+                -self.jitter_ms, self.jitter_ms)) / 1000
+        if roll < self.rate_limit_rate:
+            return 429, delay
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 503, delay
+        return 200, delay
+
+    def record(self, status):
+        with self._lock:
+            self.counts[status] += 1
+
+
+class StubSearchHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != STUB_PATH:
+            self._send(404, {"error": {"code": 404, "message": "Not found"}})
+            return
+
+        status, delay = self.server.next_outcome()
+        time.sleep(delay)
+        if status == 429:
+            self._send(429, {"error": {"code": 429,
+                                       "message": "Rate limit exceeded"}},
+                       {"Retry-After": str(self.server.retry_after)})
+            return
+        if status != 200:
+            self._send(status, {"error": {"code": status,
+                                          "message": "Backend error"}})
+            return
+
+        params = parse_qs(url.query)
+        query = params.get("q", [""])[0]
+        num = int(params.get("num", ["5"])[0])
+        items = [
+            {"title": r["title"], "link": r["url"], "snippet": r["snippet"]}
+            for r in self.server.corpus.search(query, num=num)
+        ]
+        self._send(200, {"items": items} if items else {})
+
+    def _send(self, status, payload, headers=None):
+        self.server.record(status)
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def start_stub_server(host="127.0.0.1", port=0, corpus=None, **options):
+    """
+    Запускает сервер в фоновом потоке (port=0 — свободный порт).
+    Остановка — server.shutdown().
+    """
+    server = StubSearchServer((host, port), corpus or SearchCorpus.load(),
+                              **options)
+    threading.Thread(target=server.serve_forever, name="search-stub",
+                     daemon=True).start()
+    return server
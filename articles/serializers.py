@@ -4,13 +4,52 @@ from rest_framework import serializers
 from .models import PlagiarismCheck, Report
 
 
-class ReportSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    ?fields=id,title в GET-запросе оставляет в ответе только
+    перечисленные поля; неизвестные имена игнорируются.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method != "GET":
+            return
+        fields = request.query_params.get("fields")
+        if not fields:
+            return
+        wanted = {name.strip() for name in fields.split(",")}
+        for name in set(self.fields) - wanted:
+            self.fields.pop(name)
+
+
+class ReportSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    author_email = serializers.EmailField(source="author.email",
+                                          read_only=True)
+    author_name = serializers.CharField(source="author.full_name",
+                                        read_only=True)
+
     class Meta:
         model = Report
         fields = "__all__"
 
 
-class PlagiarismCheckSerializer(serializers.ModelSerializer):
+class ReportListSerializer(ReportSerializer):
+    # Текст доклада (до сотен КБ) отдаётся только в детальном ответе
+    class Meta:
+        model = Report
+        exclude = ["content"]
+
+
+class ReportSearchSerializer(ReportListSerializer):
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(ReportListSerializer.Meta):
+        pass
+
+
+class PlagiarismCheckSerializer(SparseFieldsMixin,
+                                serializers.ModelSerializer):
     class Meta:
         model = PlagiarismCheck
         fields = "__all__"
@@ -0,0 +1,28 @@
+# articles/signals.py
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .fulltext import ensure_sqlite_triggers
+from .local_index import index_report
+from .models import Report
+
+
+@receiver(post_save, sender=Report)
+def update_local_index(sender, instance, update_fields=None, **kwargs):
+    # Результаты анализа сохраняются с update_fields — текст не менялся
+    if update_fields is not None and "content" not in update_fields:
+        return
+    index_report(instance)
+
+
+@receiver(post_delete, sender=Report)
+def delete_certificate_file(sender, instance, **kwargs):
+    if instance.certificate:
+        instance.certificate.delete(save=False)
+
+
+@receiver(post_migrate)
+def restore_fulltext_triggers(sender, using, **kwargs):
+    # Миграция, пересоздавшая articles_report в SQLite, удалила триггеры
+    if sender.name == "articles":
+        ensure_sqlite_triggers(using)
@@ -0,0 +1,120 @@
+# articles/similarity.py
+import math
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+PLAGIARISM_THRESHOLD = 60.0
+FRAGMENT_SIZE = 25
+FRAGMENT_STEP = 20
+MIN_FRAGMENT_WORDS = 10
+
+# IDF термина, встречающегося только в одном документе из пары
+# (smooth_idf TfidfVectorizer при n=2, df=1: ln(3/2) + 1).
+# Термины, общие для обоих документов, получают IDF = 1.
+_SINGLE_DOC_IDF = math.log(1.5) + 1.0
+
+
+def split_into_fragments(text, size=FRAGMENT_SIZE, step=FRAGMENT_STEP,
+                         min_words=MIN_FRAGMENT_WORDS):
+    """
+    Режет текст на перекрывающиеся окна по size слов с шагом step,
+    отбрасывая хвосты короче min_words.
+    """
+    words = text.split()
+    return [
+        " ".join(words[i: i + size])
+        for i in range(0, len(words), step)
+        if len(words[i: i + size]) >= min_words
+    ]
+
+
+def pairwise_similarity_percent(fragment, snippet):
+    """
+    Исходный способ: отдельный TfidfVectorizer на каждую пару.
+    Оставлен как эталон для тестов и бенчмарка.
+    """
+    try:
+        vectorizer = TfidfVectorizer().fit_transform([fragment, snippet])
+        cos_sim = cosine_similarity(vectorizer[0:1], vectorizer[1:2])[0][0]
+        return round(cos_sim * 100, 2)
+    except Exception:
+        return 0.0
+
+
+def batch_similarity_percent(pairs):
+    """
+    Считает те же значения, что pairwise_similarity_percent, для всех пар
+    (фрагмент, сниппет) за один проход: тексты векторизуются один раз,
+    а скалярные произведения и нормы пар берутся из разреженных матриц.
+
+    TF-IDF, обученный на двух документах, даёт IDF = 1 общим терминам
+    и _SINGLE_DOC_IDF остальным, поэтому для пары векторов счётчиков a, b:
+        a·b взвешенный = a·b (ненулевые только общие термины),
+        |a|² взвешенный = c²·|a|² − (c² − 1)·Σ_{t ∈ b} a_t².
+    """
+    if not pairs:
+        return []
+
+    fragments = [frag or "" for frag, _ in pairs]
+    snippets = [snippet or "" for _, snippet in pairs]
+    try:
+        counts = CountVectorizer().fit_transform(fragments + snippets)
+    except ValueError:
+        # Пустой словарь: ни в одном тексте нет слов
+        return [0.0] * len(pairs)
+
+    counts = counts.tocsr().astype(np.float64)
+    a = counts[: len(pairs)]
+    b = counts[len(pairs):]
+    a_bin = a.sign()
+    b_bin = b.sign()
+    a_sq = a.multiply(a)
+    b_sq = b.multiply(b)
+
+    dot = np.asarray(a.multiply(b).sum(axis=1)).ravel()
+    a_shared_sq = np.asarray(a_sq.multiply(b_bin).sum(axis=1)).ravel()
+    b_shared_sq = np.asarray(b_sq.multiply(a_bin).sum(axis=1)).ravel()
+    a_norm_sq = np.asarray(a_sq.sum(axis=1)).ravel()
+    b_norm_sq = np.asarray(b_sq.sum(axis=1)).ravel()
+
+    c2 = _SINGLE_DOC_IDF ** 2
+    a_weighted = c2 * a_norm_sq - (c2 - 1.0) * a_shared_sq
+    b_weighted = c2 * b_norm_sq - (c2 - 1.0) * b_shared_sq
+    denom = np.sqrt(a_weighted * b_weighted)
+
+    cos_sim = np.divide(dot, denom, out=np.zeros_like(dot),
+                        where=denom > 0)
+    return [round(float(value) * 100, 2) for value in cos_sim]
+
+
+def score_fragment_matches(fragments, search_results):
+    """
+    Для каждого фрагмента с результатами поиска находит лучший сниппет.
+    search_results — {индекс фрагмента: [{"title", "url", "snippet"}]}.
+    Возвращает {индекс фрагмента: (лучший процент, совпадение или None)}.
+    """
+    pairs = []
+    owners = []
+    for index, results in search_results.items():
+        for res in results:
+            pairs.append((fragments[index], res.get("snippet")))
+            owners.append((index, res))
+
+    scores = batch_similarity_percent(pairs)
+
+    best = {index: (0.0, None) for index in search_results}
+    for (index, res), sim_percent in zip(owners, scores):
+        if sim_percent > best[index][0]:
+            best[index] = (
+                sim_percent,
+                {
+                    "fragment": fragments[index],
+                    "similarity_percent": sim_percent,
+                    "url": res["url"],
+                    "title": res["title"],
+                    "snippet": res["snippet"],
+                },
+            )
+    return best
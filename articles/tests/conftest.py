@@ -0,0 +1,32 @@
+# articles/tests/conftest.py
+import pytest
+
+from articles.models import Report
+
+
+@pytest.fixture
+def make_user(django_user_model):
+    def make(email, full_name="Test User"):
+        return django_user_model.objects.create_user(
+            email=email, full_name=full_name, password="pass"
+        )
+
+    return make
+
+
+@pytest.fixture
+def author(make_user):
+    return make_user("author@example.com", "Report Author")
+
+
+@pytest.fixture
+def report(author):
+    return Report.objects.create(author=author, title="Доклад",
+                                 content="some report text")
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    # Справки и загруженные файлы пишутся во временный каталог
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
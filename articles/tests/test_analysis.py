@@ -1,9 +1,28 @@
 # articles/tests/test_analysis.py
-from unittest.mock import patch
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep, time
+from unittest.mock import MagicMock, patch
 
-from articles import cache_utils
+import pytest
+import torch
+from django.urls import reverse
+
+from articles import ai_detection, cache_utils
 from articles.ai_detection import detect_ai
-from articles.external_search import search_google_fragment
+from articles.decorators import SearchError, cache_stats, cached_search
+from articles.external_search import get_with_backoff, search_google_fragment
+from articles.inference_server import InferenceServer
+from articles.local_index import find_local_matches
+from articles.models import Report
+from articles.search_quota import (QuotaExceededError, SearchScheduler,
+                                   get_scheduler)
+from articles.similarity import (batch_similarity_percent,
+                                 pairwise_similarity_percent,
+                                 score_fragment_matches, split_into_fragments)
+from articles.use_cases import (analyze_text_fragments, search_deadline,
+                                search_fragments)
 
 
 def test_cache_set_and_get(tmp_path, monkeypatch):
@@ -11,8 +30,8 @@ def test_cache_set_and_get(tmp_path, monkeypatch):
     test_results = [{"title": "Test",
                      "url": "http://example.com", "snippet": "text"}]
 
-    cache_file = tmp_path / "test_cache.json"
-    monkeypatch.setattr(cache_utils, "CACHE_FILE", str(cache_file))
+    cache_file = tmp_path / "test_cache.sqlite3"
+    monkeypatch.setattr(cache_utils, "CACHE_DB", str(cache_file))
 
     cache_utils.set_cached_result(test_query, test_results)
     cached = cache_utils.get_cached_result(test_query)
@@ -20,13 +39,35 @@ def test_cache_set_and_get(tmp_path, monkeypatch):
     assert cached == test_results
 
 
-@patch("articles.external_search.get_cached_result")
-@patch("articles.external_search.set_cached_result")
-@patch("articles.external_search.requests.get")
-def test_search_google_fragment_uses_api(mock_get,
+def test_import_json_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_utils, "CACHE_DB",
+                        str(tmp_path / "test_cache.sqlite3"))
+    json_file = tmp_path / "google_search_cache.json"
+    json_file.write_text(json.dumps({
+        "fresh": {"timestamp": time(), "results": [{"title": "A"}]},
+        "stale": {"timestamp": 0, "results": [{"title": "B"}]},
+    }), encoding="utf-8")
+
+    assert cache_utils.import_json_cache(str(json_file)) == 2
+    assert cache_utils.get_cached_result("fresh") == [{"title": "A"}]
+    assert cache_utils.get_cached_result("stale") is None
+
+    assert cache_utils.purge_cache() == 1
+
+
+@patch("articles.decorators.get_cached_result")
+@patch("articles.decorators.set_cached_result")
+@patch("articles.external_search.get_session")
+def test_search_google_fragment_uses_api(mock_get_session,
                                          mock_set_cache,
-                                         mock_get_cache):
+                                         mock_get_cache,
+                                         settings, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_utils, "CACHE_DB",
+                        str(tmp_path / "cache.sqlite3"))
+    settings.GOOGLE_API_KEY = "test-key"
+    settings.GOOGLE_CSE_ID = "test-cse"
     mock_get_cache.return_value = None
+    mock_get = mock_get_session.return_value.get
 
     mock_response = {
         "items": [
@@ -45,7 +86,306 @@ def test_search_google_fragment_uses_api(mock_get,
     assert mock_set_cache.called
 
 
+def test_search_scheduler_enforces_daily_quota(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_utils, "CACHE_DB",
+                        str(tmp_path / "cache.sqlite3"))
+    scheduler = SearchScheduler("test", qps=0, daily_quota=3)
+
+    for _ in range(3):
+        scheduler.acquire()
+    with pytest.raises(QuotaExceededError):
+        scheduler.acquire()
+
+    # Счётчик общий: новый экземпляр (как в другом процессе) видит расход
+    usage = SearchScheduler("test", qps=0, daily_quota=3).usage()
+    assert (usage["used"], usage["remaining"]) == (3, 0)
+
+
+def test_search_scheduler_limits_rate(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_utils, "CACHE_DB",
+                        str(tmp_path / "cache.sqlite3"))
+    scheduler = SearchScheduler("test", qps=20, daily_quota=0)
+
+    start = time()
+    for _ in range(30):  # 20 из бакета сразу, ещё 10 — со скоростью 20/с
+        scheduler.acquire()
+
+    assert time() - start >= 0.4
+
+
+@patch("articles.external_search.sleep")
+@patch("articles.external_search.get_session")
+def test_search_retries_rate_limited_requests(mock_get_session, mock_sleep,
+                                              settings, tmp_path,
+                                              monkeypatch):
+    monkeypatch.setattr(cache_utils, "CACHE_DB",
+                        str(tmp_path / "cache.sqlite3"))
+    settings.SEARCH_RETRIES = 3
+    limited = MagicMock(status_code=429, headers={"Retry-After": "2"})
+    ok = MagicMock(status_code=200, headers={})
+    mock_get_session.return_value.get.side_effect = [limited, limited, ok]
+
+    assert get_with_backoff("http://search", {}, get_scheduler()) is ok
+    assert mock_sleep.call_count == 2
+    assert all(call.args[0] >= 2 for call in mock_sleep.call_args_list)
+    assert get_scheduler().usage()["used"] == 3
+
+
+@patch("articles.use_cases.search_fragment")
+def test_search_fragments_stops_when_quota_is_exhausted(mock_search):
+    mock_search.side_effect = QuotaExceededError("квота")
+
+    with pytest.raises(QuotaExceededError):
+        search_fragments(["a", "b", "c"], max_workers=2, deadline=5)
+
+
+def test_search_deadline_scales_with_rate_limit(settings):
+    settings.SEARCH_DEADLINE_SECONDS = 120
+    settings.SEARCH_QPS = 5
+
+    assert search_deadline(1000) == 320
+    settings.SEARCH_QPS = 0
+    assert search_deadline(1000) == 120
+
+
+@patch("articles.use_cases.search_fragment")
+def test_search_fragments_counts_unsearched_fragments(mock_search):
+    mock_search.side_effect = lambda frag: sleep(0.5) or [{"snippet": frag}]
+    stats = {}
+
+    results = search_fragments(["a", "b", "c", "d"], max_workers=1,
+                               deadline=0.2, stats=stats)
+
+    assert results == {}
+    assert stats == {"failed": 0, "unsearched": 4}
+
+
+@patch("articles.use_cases.search_fragment")
+def test_search_fragments_runs_all_fragments(mock_search):
+    mock_search.side_effect = lambda frag: [{"snippet": frag}]
+    fragments = [f"fragment {i}" for i in range(10)]
+    progress = []
+
+    results = search_fragments(
+        fragments, progress_callback=lambda done, total: progress.append(done),
+        max_workers=4, deadline=5,
+    )
+
+    assert results == {i: [{"snippet": frag}]
+                       for i, frag in enumerate(fragments)}
+    assert progress[-1] == len(fragments)
+
+
+@patch("articles.decorators.get_cached_result", return_value=None)
+@patch("articles.decorators.set_cached_result")
+def test_cached_search_coalesces_and_skips_errors(mock_set_cache,
+                                                  mock_get_cache):
+    calls = []
+    release = threading.Event()
+
+    @cached_search
+    def slow_search(query):
+        calls.append(query)
+        release.wait(timeout=5)
+        return [{"snippet": query}]
+
+    @cached_search
+    def failing_search(query):
+        raise SearchError("429")
+
+    cache_stats.reset()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(slow_search, "same") for _ in range(4)]
+        while cache_stats.as_dict()["coalesced"] < 3:
+            sleep(0.01)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert calls == ["same"]
+    assert all(r == [{"snippet": "same"}] for r in results)
+    assert mock_set_cache.call_count == 1
+
+    for _ in range(2):
+        with pytest.raises(SearchError):
+            failing_search("broken")
+    assert mock_set_cache.call_count == 1
+    stats = cache_stats.as_dict()
+    assert stats["errors"] == 1
+    assert stats["negative_hits"] == 1
+
+
+def test_batch_similarity_matches_pairwise():
+    pairs = [
+        ("The quick brown fox jumps over the lazy dog",
+         "A quick brown fox jumped over a lazy dog"),
+        ("Совершенно другой текст про анализ данных",
+         "The quick brown fox"),
+        ("repeat repeat repeat word", "repeat word word"),
+        ("", "empty fragment"),
+        ("only fragment", None),
+    ]
+
+    assert batch_similarity_percent(pairs) == [
+        pairwise_similarity_percent(f, s) for f, s in pairs
+    ]
+
+
+def test_score_fragment_matches_picks_best_snippet():
+    fragments = ["alpha beta gamma delta", "unrelated words here"]
+    search_results = {
+        0: [
+            {"title": "Low", "url": "http://low", "snippet": "alpha zeta"},
+            {"title": "High", "url": "http://high",
+             "snippet": "alpha beta gamma delta"},
+        ],
+        1: [],
+    }
+
+    best = score_fragment_matches(fragments, search_results)
+
+    assert best[0][0] == 100.0
+    assert best[0][1]["url"] == "http://high"
+    assert best[1] == (0.0, None)
+
+
+@pytest.mark.django_db
+def test_local_index_finds_resubmitted_report(author):
+    original_text = " ".join(f"word{i}" for i in range(200))
+    original = Report.objects.create(author=author, title="Original",
+                                     content=original_text)
+    resubmitted = Report.objects.create(
+        author=author, title="Copy",
+        content="Новое вступление к докладу. " + original_text,
+    )
+    unrelated = Report.objects.create(
+        author=author, title="Other",
+        content=" ".join(f"other{i}" for i in range(200)),
+    )
+
+    fragments = split_into_fragments(resubmitted.content)
+    matches = find_local_matches(fragments, exclude_report_id=resubmitted.pk)
+
+    assert matches
+    urls = {match["url"] for _, match in matches.values()}
+    assert urls == {reverse("report_info", args=[original.pk])}
+    assert not find_local_matches(split_into_fragments(unrelated.content),
+                                  exclude_report_id=unrelated.pk)
+
+
+@patch("transformers.AutoModelForSequenceClassification")
+@patch("transformers.AutoTokenizer")
+def test_ai_model_loads_lazily_once(mock_tokenizer, mock_model, monkeypatch):
+    holder = ai_detection.ModelHolder(ai_detection.MODEL_NAME)
+    monkeypatch.setattr(ai_detection, "_holder", holder)
+    assert not ai_detection.is_ready()
+    assert not mock_model.from_pretrained.called
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        loaded = list(executor.map(lambda _: ai_detection.get_model(),
+                                   range(4)))
+
+    assert ai_detection.is_ready()
+    assert mock_model.from_pretrained.call_count == 1
+    assert all(pair == loaded[0] for pair in loaded)
+
+
+def test_detect_ai_detailed_scores_all_chunks(monkeypatch, settings):
+    settings.AI_BATCH_SIZE = 2
+    # Три окна: два полных по 6 токенов и хвост из 3 токенов
+    attention_mask = torch.tensor([[1] * 6, [1] * 6, [1] * 3 + [0] * 3])
+    tokenizer = MagicMock(return_value={
+        "input_ids": torch.ones((3, 6), dtype=torch.long),
+        "attention_mask": attention_mask,
+    }, pad_token_id=1)
+    chunk_logits = iter([
+        torch.tensor([[0.0, 0.0], [0.0, 0.0]]),  # по 50 %
+        torch.tensor([[0.0, 10.0]]),  # ~100 %
+    ])
+    model = MagicMock(side_effect=lambda **kw: MagicMock(
+        logits=next(chunk_logits)))
+    monkeypatch.setattr(ai_detection, "get_model",
+                        lambda: (tokenizer, model))
+    monkeypatch.setattr(ai_detection, "_server", None)
+
+    result = ai_detection.detect_ai_detailed("long text", aggregation="max")
+
+    assert model.call_count == 2
+    assert tokenizer.call_args.kwargs["return_overflowing_tokens"] is True
+    assert [c["tokens"] for c in result["chunks"]] == [6, 6, 3]
+    assert result["chunks"][0]["score"] == 50.0
+    assert result["score"] == result["chunks"][2]["score"]
+    # Последний пакет обрезан до длины самого длинного окна в нём
+    assert model.call_args.kwargs["input_ids"].shape == (1, 3)
+
+
+def test_inference_server_batches_concurrent_callers():
+    batches = []
+
+    def run_batch(items):
+        batches.append(len(items))
+        return [item * 2 for item in items]
+
+    server = InferenceServer(run_batch, max_batch_size=4, max_wait_ms=50)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda x: server.infer([x])[0],
+                                    range(8)))
+
+    assert results == [x * 2 for x in range(8)]
+    assert sum(batches) == 8
+    assert max(batches) <= 4
+    assert len(batches) < 8
+    metrics = server.metrics.as_dict()
+    assert metrics["items"] == 8
+    assert metrics["batches"] == len(batches)
+
+
+@pytest.mark.django_db
+@patch("articles.use_cases.search_fragment")
+def test_reanalysis_only_searches_changed_fragments(mock_search, author):
+    mock_search.side_effect = lambda frag: [
+        {"title": "Source", "url": "http://example.com", "snippet": frag}
+    ]
+    words = [f"token{i}" for i in range(100)]
+    report = Report.objects.create(author=author, title="Incremental",
+                                   content=" ".join(words))
+
+    first_stats = {}
+    first, _ = analyze_text_fragments(report.content, report_id=report.pk,
+                                      stats=first_stats)
+    assert first_stats["search_calls"] == first_stats["fragments"] == 5
+
+    mock_search.reset_mock()
+    second_stats = {}
+    second, _ = analyze_text_fragments(report.content, report_id=report.pk,
+                                       stats=second_stats)
+    assert not mock_search.called
+    assert second_stats["search_calls_saved"] == 5
+    assert second == first
+
+    words[90] = "typo"  # меняется только последний фрагмент
+    report.content = " ".join(words)
+    report.save()
+    third_stats = {}
+    analyze_text_fragments(report.content, report_id=report.pk,
+                           stats=third_stats)
+    assert third_stats["search_calls"] == 1
+    assert report.fragment_results.count() == 5
+
+
 def test_detect_ai_probability_range():
     result = detect_ai("This is an example "
                        "academic abstract about psychology.")
     assert 0 <= result <= 100
+
+
+@pytest.mark.django_db
+def test_cache_stats_endpoint_is_staff_only(client, author):
+    client.force_login(author)
+    assert client.get(reverse("cache_stats")).status_code == 302
+
+    author.is_staff = True
+    author.save()
+    data = client.get(reverse("cache_stats")).json()
+    assert set(data) == {"pid", "search_cache", "pdf_cache"}
+    assert "hit_rate" in data["search_cache"]
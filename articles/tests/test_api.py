@@ -0,0 +1,71 @@
+# articles/tests/test_api.py
+from datetime import datetime
+
+import pytest
+from django.utils import timezone
+
+from articles.models import Report
+
+URL = "/articles/api/reports/"
+
+
+@pytest.fixture
+def reports(make_user):
+    alice = make_user("alice@example.com", "Alice")
+    bob = make_user("bob@example.com", "Bob")
+    created = [
+        Report.objects.create(author=alice if i % 2 else bob,
+                              title=f"Доклад {i}", content="x" * 1000,
+                              status="published" if i < 3 else "draft")
+        for i in range(5)
+    ]
+    return created
+
+
+@pytest.mark.django_db
+def test_report_list_is_lean_and_cursor_paginated(client, reports,
+                                                 django_assert_num_queries):
+    with django_assert_num_queries(1):
+        response = client.get(URL, {"page_size": 2})
+    page = response.json()
+    assert len(page["results"]) == 2
+    assert "content" not in page["results"][0]
+    assert page["results"][0]["author_email"]
+    assert page["next"] and page["previous"] is None
+
+    seen = [r["id"] for r in page["results"]]
+    while page["next"]:
+        page = client.get(page["next"]).json()
+        seen += [r["id"] for r in page["results"]]
+    assert seen == [r.pk for r in reversed(reports)]
+
+    detail = client.get(f"{URL}{reports[0].pk}/").json()
+    assert detail["content"] == "x" * 1000
+
+
+@pytest.mark.django_db
+def test_report_list_filters_and_sparse_fields(client, reports):
+    response = client.get(URL, {"author": "alice@example.com",
+                                "status": "published",
+                                "fields": "id,title"})
+    results = response.json()["results"]
+    assert results == [{"id": reports[1].pk, "title": "Доклад 1"}]
+
+    assert client.get(URL, {"status": "unknown"}).status_code == 400
+    assert client.get(URL, {"author": "nobody@example.com"}
+                      ).json()["results"] == []
+
+
+@pytest.mark.django_db
+def test_report_list_date_range_includes_whole_days(client, reports):
+    moments = [datetime(2026, 3, 1, 0, 0), datetime(2026, 3, 2, 23, 59),
+               datetime(2026, 3, 3, 0, 0)]
+    for report, moment in zip(reports, moments):
+        Report.objects.filter(pk=report.pk).update(
+            created_at=timezone.make_aware(moment)
+        )
+
+    response = client.get(URL, {"date_from": "2026-03-01",
+                                "date_to": "2026-03-02", "fields": "id"})
+    assert {r["id"] for r in response.json()["results"]} == \
+        {reports[0].pk, reports[1].pk}
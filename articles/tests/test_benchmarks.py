@@ -0,0 +1,76 @@
+# articles/tests/test_benchmarks.py
+from io import StringIO
+from unittest.mock import patch
+
+import torch
+from django.core.management import call_command
+
+from articles import pdf_extraction
+from articles.management.commands import benchmark_ai_model
+from benchmarks import suite
+from benchmarks.suite import compare, measure, run_suite
+
+
+def _results(**medians):
+    return {"results": {name: {"median_s": value}
+                        for name, value in medians.items()}}
+
+
+def test_compare_flags_only_regressions_over_threshold():
+    baseline = _results(fast=1.0, slow=1.0, removed=1.0)
+    current = _results(fast=1.1, slow=1.5, added=1.0)
+
+    rows = {row[0]: row for row in compare(current, baseline, 0.2)}
+
+    assert set(rows) == {"fast", "slow"}
+    assert not rows["fast"][4]
+    assert rows["slow"][4]
+
+
+def test_suite_measures_certificate_case():
+    calls = []
+    stats = measure(lambda: calls.append(1), repeat=3)
+    assert len(calls) == 4  # прогрев + 3 замера
+    assert stats["min_s"] <= stats["median_s"] <= stats["p95_s"]
+
+    report = run_suite(["certificate"], repeat=1, log=lambda line: None)
+    assert set(report["results"]) == {"prepare_pdf_certificate"}
+
+
+def test_pdf_case_reads_from_disk_in_parallel(monkeypatch, settings):
+    monkeypatch.setattr(suite, "PDF_SIZES", {"medium": 20})
+    settings.PDF_WORKERS = 2
+    settings.PDF_PARALLEL_MIN_PAGES = 10
+
+    with patch("articles.pdf_extraction._iter_parallel",
+               wraps=pdf_extraction._iter_parallel) as parallel:
+        report = run_suite(["pdf"], repeat=1, log=lambda line: None)
+
+    assert set(report["results"]) == {"pdf_extract_medium"}
+    assert parallel.called
+
+
+class _StubHolder:
+    def __init__(self, model_name, mode=None):
+        self.mode = mode
+
+    def load(self):
+        return None, torch.nn.Linear(4, 2)
+
+
+def test_benchmark_ai_model_smoke(monkeypatch):
+    monkeypatch.setattr(benchmark_ai_model, "ModelHolder", _StubHolder)
+    monkeypatch.setattr(benchmark_ai_model, "encode_windows",
+                        lambda tokenizer, text: [[0] * len(text.split())])
+    monkeypatch.setattr(benchmark_ai_model, "forward_windows",
+                        lambda tokenizer, model, rows: [0.25] * len(rows))
+    # Заглушки не переживают spawn — режимы замеряются в этом процессе
+    monkeypatch.setattr(benchmark_ai_model, "measure_isolated",
+                        benchmark_ai_model.measure_mode)
+    out = StringIO()
+
+    call_command("benchmark_ai_model", repeat=1, stdout=out)
+
+    lines = out.getvalue().splitlines()
+    assert [line.split()[0] for line in lines[1:3]] == ["fp32", "int8"]
+    assert lines[2].split()[-2:] == ["0.00", "0.00"]  # оценки совпали
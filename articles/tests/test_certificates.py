@@ -0,0 +1,94 @@
+# articles/tests/test_certificates.py
+import io
+import zipfile
+from unittest.mock import patch
+
+import pytest
+from django.urls import reverse
+
+from articles import certificate_render, use_cases
+from articles.models import Report
+
+pytestmark = pytest.mark.usefixtures("media_root")
+
+
+@pytest.mark.django_db
+def test_certificate_rendered_once_and_revalidated(client, report):
+    url = reverse("generate_certificate", args=[report.id])
+    render = patch("articles.use_cases.prepare_pdf_certificate",
+                   wraps=use_cases.prepare_pdf_certificate)
+    with render as mock_render:
+        first = client.get(url)
+        body = b"".join(first.streaming_content)
+        assert first.status_code == 200
+        assert body.startswith(b"%PDF")
+        etag = first["ETag"]
+        assert first["Last-Modified"]
+
+        again = client.get(url)
+        assert b"".join(again.streaming_content) == body
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert mock_render.call_count == 1
+
+        # Новые оценки — новая версия справки
+        report.originality_percent = 42.0
+        report.save(update_fields=["originality_percent"])
+        changed = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert changed.status_code == 200
+        assert changed["ETag"] != etag
+        assert mock_render.call_count == 2
+
+    report.refresh_from_db()
+    old_files = list(report.certificate.storage.listdir("certificates")[1])
+    assert old_files == [report.certificate.name.split("/")[-1]]
+
+
+def test_fonts_registered_once_per_process():
+    certificate_render.register_fonts.cache_clear()
+    font_path = use_cases.certificate_font_path()
+    with patch("articles.certificate_render.TTFont") as mock_font, \
+            patch("articles.certificate_render.pdfmetrics.registerFont"):
+        certificate_render.register_fonts(font_path)
+        certificate_render.register_fonts(font_path)
+    assert mock_font.call_count == 1
+    certificate_render.register_fonts.cache_clear()
+
+
+@pytest.mark.django_db
+def test_export_streams_zip_of_filtered_certificates(client, report,
+                                                    make_user,
+                                                    django_user_model):
+    other = make_user("other@example.com")
+    Report.objects.create(author=other, title="Чужой", content="text")
+    second = Report.objects.create(author=report.author, title="Второй",
+                                   content="text", status="published")
+    use_cases.get_certificate(report)  # одна справка уже готова
+
+    url = reverse("export_certificates")
+    assert client.get(url).status_code == 302  # только персонал
+
+    django_user_model.objects.create_superuser(
+        email="admin@example.com", full_name="Admin", password="pass"
+    )
+    client.login(email="admin@example.com", password="pass")
+    response = client.get(url, {"author": report.author.email})
+    assert response.status_code == 200
+    assert response.streaming
+
+    data = b"".join(response.streaming_content)
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        names = sorted(archive.namelist())
+        assert names == [f"certificate_report_{report.pk}.pdf",
+                         f"certificate_report_{second.pk}.pdf"]
+        assert all(archive.read(n).startswith(b"%PDF") for n in names)
+
+    second.refresh_from_db()
+    assert second.certificate  # отрендеренная справка сохранена
+
+    response = client.get(url, {"status": "published"})
+    with zipfile.ZipFile(
+        io.BytesIO(b"".join(response.streaming_content))
+    ) as archive:
+        assert archive.namelist() == [f"certificate_report_{second.pk}.pdf"]
+    assert client.get(url, {"date_from": "2026-02-01",
+                            "date_to": "2026-01-01"}).status_code == 400
@@ -0,0 +1,69 @@
+import pytest
+
+from articles import cache_utils
+from articles.fragmenters import (Fragmenter, noise_ratio, sentence_fragments,
+                                  stratified_sample)
+from articles.management.commands.evaluate_fragmenters import (
+    baseline_evidence, offline_originality)
+from articles.similarity import split_into_fragments
+
+TEXT = " ".join(f"word{i}" for i in range(200))
+
+
+def test_default_fragmenter_matches_fixed_windows():
+    assert Fragmenter().split(TEXT) == split_into_fragments(TEXT)
+
+
+def test_sentence_fragments_follow_sentence_boundaries():
+    text = ("Первое предложение из нескольких слов для проверки нарезки. "
+            "Второе предложение тоже достаточно длинное для одного окна. "
+            "Третье предложение завершает этот короткий тестовый абзац.")
+
+    fragments = sentence_fragments(text, size=10, min_words=5)
+
+    assert len(fragments) == 3
+    assert all(fragment.endswith(".") for fragment in fragments)
+
+
+def test_noise_filter_and_dedupe():
+    noisy = "и в на 1 2 3 это что по с не а и в на 1 2 3"
+    repeated = "уникальная методика расчёта устойчивости мостовых конструкций"
+    text = f"{noisy}. {repeated}. {repeated.upper()}."
+    fragmenter = Fragmenter(strategy="sentence", size=8, min_words=5,
+                            max_noise_ratio=0.6, dedupe=True)
+
+    assert noise_ratio(noisy) == 1.0
+    assert fragmenter.split(text) == [f"{repeated}."]
+
+
+def test_query_budget_is_stratified_and_deterministic():
+    items = list(range(100))
+
+    sample = stratified_sample(items, 10)
+
+    assert sample == [5, 15, 25, 35, 45, 55, 65, 75, 85, 95]
+    assert stratified_sample(items, 10) == sample
+    assert stratified_sample(items[:5], 10) == items[:5]
+    assert len(Fragmenter(max_queries=3).split(TEXT)) == 3
+
+
+@pytest.mark.django_db
+def test_offline_oracle_skips_fragments_without_evidence(tmp_path,
+                                                         monkeypatch):
+    monkeypatch.setattr(cache_utils, "CACHE_DB",
+                        str(tmp_path / "cache.sqlite3"))
+    words = TEXT.split()
+    first_window = " ".join(words[:25])
+    # В кэше только первое окно эталона, и оно найдено в сети
+    cache_utils.set_cached_result(first_window, [
+        {"title": "T", "url": "http://example.com", "snippet": first_window}
+    ])
+    evidence = baseline_evidence(words)
+
+    fragments = Fragmenter(size=40, step=40).split(TEXT)
+    originality, coverage = offline_originality(fragments, words,
+                                                evidence, None)
+
+    # Сравнить было с чем только первый фрагмент — он и заимствован
+    assert coverage == 1 / len(fragments)
+    assert originality == 0.0
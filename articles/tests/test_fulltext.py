@@ -0,0 +1,105 @@
+# articles/tests/test_fulltext.py
+import pytest
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import connection
+from django.urls import reverse
+
+from articles.fulltext import search_reports
+from articles.models import Report
+
+URL = "/articles/api/reports/search/"
+
+
+@pytest.fixture
+def reports(author):
+    return {
+        "title": Report.objects.create(
+            author=author, title="Нейросети в образовании",
+            content="Обзор применения моделей в школах."),
+        "content": Report.objects.create(
+            author=author, title="Обзор методов",
+            content="Здесь нейросети упоминаются только в тексте."),
+        "other": Report.objects.create(
+            author=author, title="Plagiarism detection",
+            content="Fingerprinting and shingles."),
+    }
+
+
+@pytest.mark.django_db
+def test_search_ranks_title_matches_first(reports):
+    found = list(search_reports(Report.objects.all(), "нейросети"))
+    assert found == [reports["title"], reports["content"]]
+    assert found[0].rank > found[1].rank
+
+    assert list(search_reports(Report.objects.all(), "shingles")) == \
+        [reports["other"]]
+    assert not search_reports(Report.objects.all(), '"*:').exists()
+
+
+@pytest.mark.django_db
+def test_index_follows_updates_and_deletes(reports):
+    report = reports["other"]
+    report.content = "Теперь о графах."
+    report.save()
+    assert not search_reports(Report.objects.all(), "shingles").exists()
+    assert list(search_reports(Report.objects.all(), "графах")) == [report]
+
+    report.delete()
+    assert not search_reports(Report.objects.all(), "графах").exists()
+
+
+def _alter_field(old_field, new_field):
+    with connection.schema_editor() as editor:
+        editor.alter_field(Report, old_field, new_field)
+    emit_post_migrate_signal(verbosity=0, interactive=False,
+                             db=connection.alias)
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(connection.vendor != "sqlite",
+                    reason="триггеры FTS5 есть только в SQLite")
+def test_triggers_survive_report_table_rebuild(reports):
+    # Изменение поля в SQLite пересоздаёт таблицу — как миграция
+    title = Report._meta.get_field("title")
+    longer = title.clone()
+    longer.max_length = title.max_length + 1
+    longer.set_attributes_from_name("title")
+    longer.model = Report
+    _alter_field(title, longer)
+    try:
+        report = reports["other"]
+        report.title = "Сравнение графов"
+        report.save()
+        assert list(search_reports(Report.objects.all(), "графов")) == \
+            [report]
+        assert list(search_reports(Report.objects.all(), "нейросети")) == \
+            [reports["title"], reports["content"]]
+    finally:
+        _alter_field(longer, title)
+
+
+@pytest.mark.django_db
+def test_search_api_is_ranked_and_paginated(client, reports):
+    page = client.get(URL, {"q": "нейросети", "page_size": 1}).json()
+    assert page["count"] == 2
+    assert [r["id"] for r in page["results"]] == [reports["title"].pk]
+    assert "content" not in page["results"][0]
+    assert page["results"][0]["rank"] > 0
+    assert page["next"]
+
+    assert client.get(URL).status_code == 400
+
+
+@pytest.mark.django_db
+def test_admin_search_uses_fulltext(client, reports, django_user_model):
+    admin = django_user_model.objects.create_superuser(
+        email="admin@example.com", full_name="Admin", password="pass"
+    )
+    client.force_login(admin)
+    response = client.get(reverse("admin:articles_report_changelist"),
+                          {"q": "упоминаются"})
+    assert list(response.context["cl"].result_list) == [reports["content"]]
+
+    response = client.get(reverse("admin:articles_report_changelist"),
+                          {"q": reports["title"].author.email})
+    assert response.context["cl"].result_count == 3
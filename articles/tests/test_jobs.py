@@ -0,0 +1,288 @@
+# articles/tests/test_jobs.py
+from datetime import timedelta
+from time import sleep
+from unittest.mock import patch
+
+import pytest
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from articles import ai_detection
+from articles.decorators import SearchError
+from articles.inference_server import InferenceServer
+from articles.jobs import (claim_next_job, enqueue_analysis,
+                           process_next_job, run_job)
+from articles.metrics import record_run
+from articles.models import (AnalysisJob, PlagiarismCheck, PlagiarismMatch,
+                             Report)
+
+# Воркер заранее рендерит справку в хранилище
+pytestmark = pytest.mark.usefixtures("media_root")
+
+
+@pytest.mark.django_db
+def test_analyze_report_enqueues_job(client, report):
+    response = client.get(reverse("analyze_report", args=[report.id]))
+
+    assert response.status_code == 302
+    job = AnalysisJob.objects.get(report=report)
+    assert job.status == "queued"
+
+    # Повторный запрос не создаёт дубликат незавершённой задачи
+    client.get(reverse("analyze_report", args=[report.id]))
+    assert AnalysisJob.objects.filter(report=report).count() == 1
+
+
+@pytest.mark.django_db
+@patch("articles.jobs.analyze_report_logic")
+def test_worker_processes_job(mock_logic, client, report):
+    details = [{"fragment": "f", "similarity_percent": 90.0,
+                "url": "http://example.com", "title": "T", "snippet": "s"}]
+
+    def fake_logic(rep, progress_callback=None, stats=None):
+        progress_callback(1, 2)
+        stats.update(search_calls=3, search_calls_saved=7)
+        return 50.0, 10.0, details
+
+    mock_logic.side_effect = fake_logic
+    enqueue_analysis(report)
+
+    assert process_next_job() is True
+    assert process_next_job() is False
+
+    job = AnalysisJob.objects.get(report=report)
+    assert job.status == "done"
+    assert job.progress == 100
+    check = job.checks.get()
+    assert float(check.originality_percent) == 50.0
+    assert list(check.matches.values("fragment", "similarity_percent", "url",
+                                     "title", "snippet")) == details
+    assert job.stats == {"search_calls": 3, "search_calls_saved": 7}
+
+    response = client.get(reverse("analysis_job_status", args=[report.id]))
+    assert response.json()["status"] == "done"
+
+
+@pytest.mark.django_db
+def test_active_job_is_unique_per_report(report):
+    job = enqueue_analysis(report)
+
+    with pytest.raises(IntegrityError), transaction.atomic():
+        AnalysisJob.objects.create(report=report)
+    assert enqueue_analysis(report) == job
+
+
+@pytest.mark.django_db
+def test_orphaned_running_job_is_requeued(report, settings):
+    settings.ANALYSIS_JOB_MAX_ATTEMPTS = 2
+    enqueue_analysis(report)
+    job = claim_next_job()
+    orphaned_at = timezone.now() - timedelta(
+        seconds=settings.ANALYSIS_JOB_STALE_SECONDS + 1
+    )
+
+    # Воркер «умер»: heartbeat устарел — задачу забирает следующий
+    AnalysisJob.objects.filter(pk=job.pk).update(heartbeat_at=orphaned_at)
+    job = claim_next_job()
+    assert (job.status, job.attempts) == ("running", 2)
+
+    # Попытки исчерпаны — задача завершается ошибкой, доклад снова
+    # можно поставить в очередь
+    AnalysisJob.objects.filter(pk=job.pk).update(heartbeat_at=orphaned_at)
+    assert claim_next_job() is None
+    job.refresh_from_db()
+    assert job.status == "failed"
+    assert enqueue_analysis(report).pk != job.pk
+
+
+@pytest.mark.django_db(transaction=True)
+def test_heartbeat_is_refreshed_outside_search_progress(report, settings):
+    settings.ANALYSIS_JOB_HEARTBEAT_SECONDS = 0.05
+    enqueue_analysis(report)
+    job = claim_next_job()
+    started = job.heartbeat_at
+
+    def slow_analysis(report, progress_callback=None, stats=None):
+        # Долгий этап без колбэка прогресса (детекция ИИ, справка)
+        sleep(0.5)
+        return 70.0, 15.0, []
+
+    with patch("articles.jobs.analyze_report_logic", slow_analysis):
+        run_job(job)
+
+    job.refresh_from_db()
+    assert job.heartbeat_at > started
+
+
+@pytest.mark.django_db
+@patch("articles.use_cases.detect_ai_detailed",
+       return_value={"score": 12.5, "chunks": [{}, {}]})
+@patch("articles.use_cases.search_fragment", return_value=[])
+def test_job_stats_record_stage_timings(mock_search, mock_ai, report):
+    report.content = " ".join(f"word{i}" for i in range(60))
+    report.save()
+    enqueue_analysis(report)
+    process_next_job()
+
+    job = AnalysisJob.objects.get(report=report)
+    assert job.stats["ai_chunks"] == 2
+    assert job.stats["search_calls"] == job.stats["fragments"] == 3
+    assert {"fragmenting", "search", "scoring", "ai_detection", "save",
+            "total"} <= set(job.stats["timings"])
+
+
+@pytest.mark.django_db
+@patch("articles.use_cases.detect_ai_detailed",
+       return_value={"score": 0.0, "chunks": []})
+@patch("articles.use_cases.search_fragment",
+       side_effect=SearchError("поиск недоступен"))
+def test_failed_search_fails_job_instead_of_full_originality(
+        mock_search, mock_ai, report):
+    report.content = " ".join(f"word{i}" for i in range(60))
+    report.save()
+    enqueue_analysis(report)
+    process_next_job()
+
+    job = AnalysisJob.objects.get(report=report)
+    assert job.status == "failed"
+    assert "0%" in job.error
+    report.refresh_from_db()
+    assert report.originality_percent is None
+    assert not PlagiarismCheck.objects.filter(report=report).exists()
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_exports_stage_histograms(client, report, settings):
+    job = AnalysisJob.objects.create(report=report, status="done")
+    record_run({"search_calls": 4,
+                "timings": {"search": 0.3, "total": 2.0}})
+    settings.METRICS_TOKEN = "secret"
+
+    assert client.get(reverse("metrics")).status_code == 403
+
+    response = client.get(reverse("metrics"),
+                          HTTP_AUTHORIZATION="Bearer secret")
+    body = response.content.decode()
+    assert response.status_code == 200
+    assert ('prooftext_analysis_stage_seconds_bucket'
+            '{stage="search",le="0.25"} 0') in body
+    assert ('prooftext_analysis_stage_seconds_bucket'
+            '{stage="search",le="0.5"} 1') in body
+    assert 'prooftext_analysis_stage_seconds_count{stage="total"} 1' in body
+    assert "prooftext_analysis_search_calls_total 4" in body
+    assert 'prooftext_analysis_jobs{status="done"} 1' in body
+
+    # Агрегаты не зависят от задач: удаление доклада не уменьшает счётчики
+    job.report.delete()
+    body = client.get(reverse("metrics"),
+                      HTTP_AUTHORIZATION="Bearer secret").content.decode()
+    assert "prooftext_analysis_search_calls_total 4" in body
+    assert 'prooftext_analysis_stage_seconds_count{stage="total"} 1' in body
+
+
+@pytest.mark.django_db
+def test_reference_page_pages_through_stored_matches(client, report):
+    check = PlagiarismCheck.objects.create(report=report,
+                                           originality_percent=10)
+    PlagiarismMatch.objects.bulk_create(
+        PlagiarismMatch(plagiarism_check=check, position=i,
+                        fragment=f"fragment number {i}",
+                        similarity_percent=90.0, url="http://example.com")
+        for i in range(75)
+    )
+    url = reverse("get_reference", args=[report.id])
+
+    first = client.get(url)
+    matches = first.context["plagiarism_details"]
+    assert [m.position for m in matches] == list(range(50))
+    assert first.context["next_after"] == 49
+    assert not client.session.keys()  # в сессию ничего не пишется
+
+    second = client.get(url, {"after": 49})
+    assert [m.position for m in second.context["plagiarism_details"]] == \
+        list(range(50, 75))
+    assert second.context["next_after"] is None
+
+    # Результаты доступны повторно без нового анализа
+    assert len(client.get(url).context["plagiarism_details"]) == 50
+
+
+def _analysis_result(originality, ai_score, details, coverage=1.0):
+    def analyze(report, progress_callback=None, stats=None):
+        stats["coverage"] = coverage
+        return originality, ai_score, details
+
+    return analyze
+
+
+@pytest.mark.django_db
+@patch("articles.jobs.analyze_report_logic")
+def test_identical_text_reuses_previous_check(mock_logic, report,
+                                              make_user):
+    details = [{"fragment": "f", "similarity_percent": 90.0,
+                "url": "http://example.com", "title": "T", "snippet": "s"}]
+    mock_logic.side_effect = _analysis_result(70.0, 15.0, details)
+    enqueue_analysis(report)
+    process_next_job()
+
+    resubmitted = Report.objects.create(author=report.author, title="Copy",
+                                        content="  Some REPORT\ntext ")
+    assert resubmitted.content_hash == report.content_hash
+
+    job = enqueue_analysis(resubmitted)
+    assert job.status == "done"
+    assert mock_logic.call_count == 1
+    resubmitted.refresh_from_db()
+    assert (resubmitted.originality_percent,
+            resubmitted.ai_generated_percent) == (70.0, 15.0)
+    assert job.checks.get().matches.get().url == "http://example.com"
+
+    # force — полный анализ; текст другого автора не переиспользуется
+    AnalysisJob.objects.filter(report=resubmitted).delete()
+    assert enqueue_analysis(resubmitted, force=True).status == "queued"
+    other = make_user("other@example.com")
+    copied = Report.objects.create(author=other, title="Copy",
+                                   content=report.content)
+    assert enqueue_analysis(copied).status == "queued"
+
+
+@pytest.mark.django_db
+@patch("articles.jobs.analyze_report_logic",
+       side_effect=_analysis_result(70.0, 15.0, []))
+def test_config_change_disables_reuse(mock_logic, report, settings):
+    enqueue_analysis(report)
+    process_next_job()
+
+    settings.AI_MODEL_MODE = "int8"
+    AnalysisJob.objects.all().delete()
+    assert enqueue_analysis(report).status == "queued"
+
+
+@pytest.mark.django_db
+@patch("articles.jobs.analyze_report_logic",
+       side_effect=_analysis_result(70.0, 15.0, [], coverage=0.97))
+def test_partial_coverage_check_is_not_reused(mock_logic, report):
+    enqueue_analysis(report)
+    process_next_job()
+    assert PlagiarismCheck.objects.get(report=report).coverage == 0.97
+
+    AnalysisJob.objects.all().delete()
+    assert enqueue_analysis(report).status == "queued"
+
+
+@pytest.mark.django_db
+@patch("articles.jobs.analyze_report_logic",
+       side_effect=_analysis_result(70.0, 15.0, []))
+def test_worker_logs_inference_batch_metrics(mock_logic, report, caplog,
+                                             monkeypatch):
+    server = InferenceServer(lambda rows: rows, max_batch_size=4)
+    monkeypatch.setattr(ai_detection, "_server", server)
+    server.submit(["window"]).result(timeout=5)
+    enqueue_analysis(report)
+
+    with caplog.at_level("INFO", logger="articles.jobs"):
+        process_next_job()
+
+    assert "Пакеты детекции ИИ" in caplog.text
+    assert "'items': 1" in caplog.text
@@ -0,0 +1,65 @@
+# articles/tests/test_listings.py
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from articles.models import Report
+from articles.pagination import HTML_PAGE_SIZE
+
+@pytest.fixture
+def author(client, author):
+    client.force_login(author)
+    return author
+
+
+def _add_reports(author, count):
+    Report.objects.bulk_create(
+        Report(author=author, title=f"Доклад {i}", content="слово " * 5000)
+        for i in range(count)
+    )
+
+
+def _listing_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    report_queries = [q["sql"] for q in ctx.captured_queries
+                      if "articles_report" in q["sql"]]
+    # Текст докладов не читается
+    assert not any('"content"' in sql for sql in report_queries)
+    return len(ctx.captured_queries), response
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url_name", ["report", "profile"])
+def test_listing_queries_do_not_grow_with_reports(client, author, url_name):
+    url = reverse(url_name)
+    _add_reports(author, 5)
+    small, _ = _listing_queries(client, url)
+
+    _add_reports(author, 500)
+    large, response = _listing_queries(client, url)
+
+    assert large == small
+    assert len(response.context["reports"]) == HTML_PAGE_SIZE
+
+
+@pytest.mark.django_db
+def test_keyset_pages_cover_all_reports(client, author):
+    _add_reports(author, HTML_PAGE_SIZE * 2 + 3)
+    url = reverse("report")
+
+    seen = []
+    cursor = None
+    while True:
+        response = client.get(url, {"after": cursor} if cursor else {})
+        seen += [report.pk for report in response.context["reports"]]
+        cursor = response.context["next_cursor"]
+        if cursor is None:
+            break
+
+    expected = list(Report.objects.filter(author=author)
+                    .order_by("-created_at", "-id")
+                    .values_list("pk", flat=True))
+    assert seen == expected
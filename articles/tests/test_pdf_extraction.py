@@ -0,0 +1,150 @@
+# articles/tests/test_pdf_extraction.py
+import hashlib
+import io
+from unittest.mock import patch
+
+import fitz
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+
+from articles.models import ExtractedPdfText, Report
+from articles.pdf_extraction import (extract_pdf, extract_pdf_cached,
+                                     file_sha256, pdf_cache_stats)
+from articles.uploads import Sha256TemporaryFileUploadHandler
+
+
+def make_pdf(pages):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"Page number {i + 1}")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class TempUpload(io.BytesIO):
+    """Аналог TemporaryUploadedFile: файл лежит на диске."""
+
+    def __init__(self, path):
+        super().__init__(path.read_bytes())
+        self.path = path
+
+    def temporary_file_path(self):
+        return str(self.path)
+
+
+def test_extract_pdf_from_memory_keeps_page_order():
+    result = extract_pdf(io.BytesIO(make_pdf(3)))
+
+    assert result.page_count == 3
+    assert result.pages_extracted == 3
+    assert not result.errors
+    assert result.text.index("Page number 1") < result.text.index(
+        "Page number 3")
+
+
+def test_extract_pdf_in_parallel_by_page_range(tmp_path, settings):
+    settings.PDF_WORKERS = 2
+    settings.PDF_PARALLEL_MIN_PAGES = 2
+    path = tmp_path / "thesis.pdf"
+    path.write_bytes(make_pdf(6))
+
+    result = extract_pdf(TempUpload(path))
+
+    assert result.pages_extracted == 6
+    positions = [result.text.index(f"Page number {i}") for i in range(1, 7)]
+    assert positions == sorted(positions)
+
+
+def test_extract_pdf_honors_limits():
+    data = make_pdf(5)
+
+    by_pages = extract_pdf(io.BytesIO(data), max_pages=2)
+    assert by_pages.truncated
+    assert "Page number 3" not in by_pages.text
+
+    by_chars = extract_pdf(io.BytesIO(data), max_chars=20)
+    assert by_chars.truncated
+    assert len(by_chars.text) <= 20
+
+
+def test_extract_pdf_reports_unreadable_file():
+    result = extract_pdf(io.BytesIO(b"not a pdf"))
+
+    assert result.text == ""
+    assert result.errors
+
+
+@pytest.mark.django_db
+def test_extract_pdf_cached_skips_parsing_same_file():
+    data = make_pdf(2)
+    pdf_cache_stats.reset()
+
+    first, sha_first = extract_pdf_cached(io.BytesIO(data))
+    with patch("articles.pdf_extraction.extract_pdf") as mock_extract:
+        second, sha_second = extract_pdf_cached(io.BytesIO(data))
+
+    assert not mock_extract.called
+    assert sha_first == sha_second == hashlib.sha256(data).hexdigest()
+    assert second.text == first.text
+    stats = pdf_cache_stats.as_dict()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+@pytest.mark.django_db
+def test_truncated_cache_entry_is_not_reused_with_larger_limits(settings):
+    data = make_pdf(3)
+    settings.PDF_MAX_PAGES = 1
+    first, _ = extract_pdf_cached(io.BytesIO(data))
+    assert first.truncated and first.text == "Page number 1"
+
+    settings.PDF_MAX_PAGES = 10
+    second, _ = extract_pdf_cached(io.BytesIO(data))
+    assert not second.truncated
+    assert "Page number 3" in second.text
+    cached = ExtractedPdfText.objects.get()
+    assert (cached.truncated, cached.max_pages) == (False, 10)
+
+    # Полный текст годится и при меньшем лимите символов, если влезает
+    settings.PDF_MAX_CHARS = 1000
+    with patch("articles.pdf_extraction.extract_pdf") as mock_extract:
+        extract_pdf_cached(io.BytesIO(data))
+    assert not mock_extract.called
+
+
+def test_upload_handler_hashes_chunks_as_they_arrive(settings, tmp_path):
+    settings.FILE_UPLOAD_TEMP_DIR = str(tmp_path)
+    data = make_pdf(2)
+    handler = Sha256TemporaryFileUploadHandler()
+    handler.chunk_size = 100
+    handler.new_file("file", "report.pdf", "application/pdf", len(data))
+    for start in range(0, len(data), handler.chunk_size):
+        handler.receive_data_chunk(data[start:start + handler.chunk_size],
+                                   start)
+    upload = handler.file_complete(len(data))
+
+    assert upload.sha256 == hashlib.sha256(data).hexdigest()
+    # Второго прохода по файлу для хэша нет
+    with patch("articles.pdf_extraction.hashlib") as mock_hashlib:
+        assert file_sha256(upload) == upload.sha256
+    assert not mock_hashlib.sha256.called
+    upload.close()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("media_root")
+def test_uploaded_pdf_is_hashed_once(client, author):
+    client.force_login(author)
+    data = make_pdf(2)
+    upload = SimpleUploadedFile("report.pdf", data, "application/pdf")
+
+    with patch("articles.pdf_extraction.hashlib") as mock_hashlib:
+        client.post(reverse("register_report"),
+                    {"title": "PDF", "content": "", "file": upload})
+
+    assert not mock_hashlib.sha256.called
+    report = Report.objects.get(author=author)
+    assert report.file_sha256 == hashlib.sha256(data).hexdigest()
+    assert "Page number 2" in report.content
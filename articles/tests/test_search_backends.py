@@ -0,0 +1,63 @@
+from unittest.mock import patch
+
+import pytest
+
+from articles import cache_utils
+from articles.external_search import (FixtureSearchBackend,
+                                      GoogleSearchBackend, search_fragment)
+from articles.search_stub import SearchCorpus, start_stub_server
+
+QUERY = ("методике расчёта устойчивости мостовых конструкций при "
+         "длительной ветровой нагрузке")
+
+
+@pytest.fixture
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_utils, "CACHE_DB",
+                        str(tmp_path / "cache.sqlite3"))
+
+
+@pytest.fixture
+def stub_server():
+    server = start_stub_server(rate_limit_rate=0.3, error_rate=0.2,
+                               retry_after=0, seed=1)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_corpus_returns_matching_snippet():
+    results = SearchCorpus.load().search(QUERY)
+
+    assert results[0]["url"].endswith("bridge-wind-stability")
+    assert "ветровой нагрузке" in results[0]["snippet"]
+
+
+@patch("articles.external_search.sleep")
+def test_google_backend_retries_against_stub_server(mock_sleep, stub_server,
+                                                    isolated_cache,
+                                                    settings):
+    settings.SEARCH_API_URL = stub_server.url
+    settings.GOOGLE_API_KEY = "test-key"
+    settings.GOOGLE_CSE_ID = "test-cse"
+    settings.SEARCH_RETRIES = 10
+    settings.SEARCH_QPS = 0
+
+    results = [GoogleSearchBackend().search(QUERY) for _ in range(10)]
+
+    assert all(r[0]["url"].endswith("bridge-wind-stability")
+               for r in results)
+    errors = stub_server.counts[429] + stub_server.counts[503]
+    assert errors > 0
+    assert mock_sleep.call_count == errors
+
+
+def test_backend_is_selected_by_settings(isolated_cache, settings):
+    settings.SEARCH_BACKEND = "articles.external_search.FixtureSearchBackend"
+
+    results = search_fragment(QUERY)
+
+    assert results == FixtureSearchBackend().search(QUERY)
+    # Результаты не попадают в кэш под ключом настоящего Google
+    assert cache_utils.get_cached_result(QUERY) is None
+    assert cache_utils.get_cached_result(f"fixture:{QUERY}") == results
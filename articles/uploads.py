@@ -0,0 +1,41 @@
+# articles/uploads.py
+"""
+Обработчики загрузки файлов, считающие SHA-256 по мере приёма кусков.
+
+Хэш нужен кэшу извлечённого текста PDF (ExtractedPdfText). Считать его
+отдельным проходом по уже принятому файлу незачем: Django и так
+передаёт каждый кусок загрузки обработчику. Готовый файл получает
+атрибут sha256 (см. pdf_extraction.extract_pdf_cached).
+"""
+import hashlib
+
+from django.core.files.uploadhandler import (MemoryFileUploadHandler,
+                                             TemporaryFileUploadHandler)
+
+
+class Sha256UploadMixin:
+    def new_file(self, *args, **kwargs):
+        # До super(): MemoryFileUploadHandler, взяв файл себе, прерывает
+        # new_file исключением StopFutureHandlers
+        self._sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self._sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self._sha256.hexdigest()
+        return file
+
+
+class Sha256MemoryFileUploadHandler(Sha256UploadMixin,
+                                    MemoryFileUploadHandler):
+    pass
+
+
+class Sha256TemporaryFileUploadHandler(Sha256UploadMixin,
+                                       TemporaryFileUploadHandler):
+    pass
@@ -5,7 +5,8 @@ from rest_framework.routers import DefaultRouter
 from .views import (EditReportView, GetReferenceListView, GetReferenceView,
                     PlagiarismCheckViewSet, RegisterReportPageView,
                     ReportDeleteView, ReportDetailView, ReportViewSet,
-                    analyze_report, generate_certificate)
+                    analysis_job_status, analyze_report, cache_stats_view,
+                    export_certificates, generate_certificate)
 
 router = DefaultRouter()
 router.register(r"reports", ReportViewSet)
@@ -35,6 +36,11 @@ urlpatterns = [
         generate_certificate,
         name="generate_certificate",
     ),
+    path("certificates/export/",
+         export_certificates, name="export_certificates"),
     path("analyze-report/<int:report_id>/",
          analyze_report, name="analyze_report"),
+    path("analyze-report/<int:report_id>/status/",
+         analysis_job_status, name="analysis_job_status"),
+    path("ops/cache-stats/", cache_stats_view, name="cache_stats"),
 ]
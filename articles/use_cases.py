@@ -1,80 +1,251 @@
 # articles/use_cases.py
+import hashlib
 import io
+import json
+import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures import as_completed
 
-import fitz
 from django.conf import settings
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from django.core.files.base import ContentFile
+from django.utils import timezone
 
-from .ai_detection import detect_ai
-from .external_search import search_google_fragment
+from .ai_detection import MODEL_NAME, detect_ai_detailed
+from .certificate_render import render_certificate
+from .decorators import cache_stats
+from .external_search import search_fragment
+from .fragmenters import get_fragmenter
+from .local_index import find_local_matches
+from .metrics import StageTimer
+from .models import FragmentResult, normalized_text_hash
+from .pdf_extraction import extract_pdf
+from .search_quota import QuotaExceededError
+from .similarity import PLAGIARISM_THRESHOLD, score_fragment_matches
+
+logger = logging.getLogger(__name__)
+
+# Увеличивается при изменении алгоритма анализа, чтобы старые результаты
+# не переиспользовались для новых проверок
+ANALYSIS_VERSION = 1
+
+
+class IncompleteCoverageError(Exception):
+    """
+    Поиск не проверил достаточную долю фрагментов (ошибки поиска,
+    лимит времени): оригинальность по такой проверке была бы завышена.
+    """
 
 
 def extract_text_from_pdf(pdf_file):
-    text = ""
+    return extract_pdf(pdf_file).text
+
+
+def search_deadline(count):
+    """
+    Лимит времени на поиск count фрагментов, сек.: SEARCH_DEADLINE_SECONDS
+    плюс время, за которое токен-бакет SEARCH_QPS пропустит все запросы.
+    """
+    deadline = settings.SEARCH_DEADLINE_SECONDS
+    if settings.SEARCH_QPS > 0:
+        deadline += count / settings.SEARCH_QPS
+    return deadline
+
+
+def search_fragments(fragments, progress_callback=None,
+                     max_workers=None, deadline=None, stats=None):
+    """
+    Параллельно ищет фрагменты через search_fragment.
+    Возвращает словарь {индекс фрагмента: результаты}. Фрагменты,
+    поиск которых упал или не уложился в deadline (сек.), пропускаются
+    и учитываются в stats (dict) как failed и unsearched;
+    QuotaExceededError прерывает поиск целиком.
+    """
+    if max_workers is None:
+        max_workers = settings.SEARCH_MAX_WORKERS
+    if deadline is None:
+        deadline = search_deadline(len(fragments))
+
+    search_results = {}
+    failed = 0
+    if stats is not None:
+        stats.update(failed=0, unsearched=0)
+    if not fragments:
+        return search_results
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    futures = {
+        executor.submit(search_fragment, frag): index
+        for index, frag in enumerate(fragments)
+    }
+    done_count = 0
     try:
-        pdf_file.seek(0)
-        with fitz.open(stream=pdf_file.read(), filetype="pdf") as doc:
-            for page in doc:
-                text += page.get_text()
-    except Exception as e:
-        import logging
-
-        logging.getLogger(__name__).error(f"[PDF ERROR] {e}")
-    return text.strip()
-
-
-def analyze_text_fragments(text):
-    words = text.split()
-    fragment_size = 25
-    step = 20
-    fragments = [
-        " ".join(words[i: i + fragment_size])
-        for i in range(0, len(words), step)
-        if len(words[i: i + fragment_size]) >= 10
-    ]
+        for future in as_completed(futures, timeout=deadline):
+            done_count += 1
+            try:
+                search_results[futures[future]] = future.result()
+            except QuotaExceededError:
+                # Без поиска оригинальность была бы завышена — прерываем
+                # проверку, оставшиеся запросы отменяются в finally
+                raise
+            except Exception as e:
+                failed += 1
+                logger.error(f"[Search] Ошибка поиска фрагмента: {e}")
+            if progress_callback is not None:
+                progress_callback(done_count, len(fragments))
+    except FuturesTimeoutError:
+        logger.warning(
+            f"[Search] Превышен лимит времени {deadline} сек.: "
+            f"проверено {done_count} из {len(fragments)} фрагментов."
+        )
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    if stats is not None:
+        stats.update(failed=failed,
+                     unsearched=len(fragments) - len(search_results) - failed)
+    return search_results
+
+
+def fragment_hash(fragment):
+    return normalized_text_hash(fragment)
+
+
+def _with_fragment(match, fragment):
+    # Сохранённое совпадение могло быть найдено для фрагмента,
+    # отличающегося регистром или пробелами, — подставляем текущий
+    return dict(match, fragment=fragment) if match else None
+
+
+def _store_fragment_results(report_id, new_results, current_hashes):
+    FragmentResult.objects.filter(report_id=report_id).exclude(
+        fragment_hash__in=current_hashes
+    ).delete()
+    FragmentResult.objects.bulk_create(
+        [
+            FragmentResult(report_id=report_id, fragment_hash=digest,
+                           best_score=score, match=match)
+            for digest, (score, match) in new_results.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["report", "fragment_hash"],
+        update_fields=["best_score", "match", "checked_at"],
+    )
+
+
+def analyze_text_fragments(text, progress_callback=None, report_id=None,
+                           stats=None, fragmenter=None, timer=None):
+    """
+    Проверяет фрагменты текста. Если передан report_id, результаты
+    фрагментов сохраняются в FragmentResult, и при повторном анализе
+    в поиск уходят только новые или изменённые фрагменты.
+    В stats (dict) записывается, сколько запросов к поиску сэкономлено.
+    Фрагменты нарезает fragmenter (по умолчанию — из settings.FRAGMENTER).
+    Длительности этапов замеряет timer (StageTimer) и кладёт
+    в stats["timings"].
+    """
+    timer = timer or StageTimer()
+    fragmenter = fragmenter or get_fragmenter()
+    with timer.span("fragmenting"):
+        fragments = fragmenter.split(text)
+        hashes = [fragment_hash(frag) for frag in fragments]
 
     plagiarism_hits = 0
     total_checked = 0
     detailed_matches = []
 
-    for frag in fragments:
-        try:
-            results = search_google_fragment(frag)
-            best_match = None
-            best_score = 0.0
-
-            for res in results:
-                try:
-                    vectorizer = (TfidfVectorizer().
-                                  fit_transform([frag, res["snippet"]]))
-                    cos_sim = cosine_similarity(vectorizer[0:1],
-                                                vectorizer[1:2])[0][0]
-                    sim_percent = round(cos_sim * 100, 2)
-                except Exception:
-                    sim_percent = 0.0
-
-                if sim_percent > best_score:
-                    best_score = sim_percent
-                    best_match = {
-                        "fragment": frag,
-                        "similarity_percent": sim_percent,
-                        "url": res["url"],
-                        "title": res["title"],
-                        "snippet": res["snippet"],
-                    }
-
-            if best_score >= 60.0 and best_match:
-                plagiarism_hits += 1
-                detailed_matches.append(best_match)
-
-            total_checked += 1
-        except Exception:
-            continue
+    stored = {}
+    if report_id is not None:
+        with timer.span("stored_results"):
+            stored = {
+                result.fragment_hash: result
+                for result in FragmentResult.objects.filter(
+                    report_id=report_id, fragment_hash__in=set(hashes)
+                )
+            }
+
+    best_matches = {}
+    pending = {}  # хэш -> индекс первого фрагмента с этим хэшем
+    for index, (frag, digest) in enumerate(zip(fragments, hashes)):
+        if digest in stored:
+            result = stored[digest]
+            best_matches[index] = (result.best_score,
+                                   _with_fragment(result.match, frag))
+        else:
+            pending.setdefault(digest, index)
+
+    pending_hashes = list(pending)
+    pending_fragments = [fragments[pending[d]] for d in pending_hashes]
+
+    # Сначала бесплатный офлайн-поиск по уже загруженным докладам:
+    # найденные там фрагменты в Google не отправляются
+    with timer.span("local_index"):
+        local_matches = find_local_matches(pending_fragments,
+                                           exclude_report_id=report_id)
+    to_search = [j for j in range(len(pending_fragments))
+                 if j not in local_matches]
+
+    cache_before = cache_stats.as_dict()
+    search_stats = {}
+    with timer.span("search"):
+        found = search_fragments([pending_fragments[j] for j in to_search],
+                                 progress_callback=progress_callback,
+                                 stats=search_stats)
+    cache_after = cache_stats.as_dict()
+    search_results = {to_search[k]: results for k, results in found.items()}
+
+    with timer.span("scoring"):
+        new_matches = score_fragment_matches(pending_fragments,
+                                             search_results)
+    new_matches.update(local_matches)
+    new_results = {pending_hashes[j]: value
+                   for j, value in new_matches.items()}
+
+    for index, digest in enumerate(hashes):
+        if index not in best_matches and digest in new_results:
+            score, match = new_results[digest]
+            best_matches[index] = (score,
+                                   _with_fragment(match, fragments[index]))
+
+    if report_id is not None:
+        with timer.span("store_results"):
+            _store_fragment_results(report_id, new_results, set(hashes))
+
+    for index in sorted(best_matches):
+        best_score, best_match = best_matches[index]
+        if best_score >= PLAGIARISM_THRESHOLD and best_match:
+            plagiarism_hits += 1
+            detailed_matches.append(best_match)
+        total_checked += 1
+
+    run_stats = {
+        "fragments": len(fragments),
+        "reused": len(fragments) - sum(1 for d in hashes if d not in stored),
+        "local_matches": len(local_matches),
+        "search_calls": len(to_search),
+        "search_calls_saved": len(fragments) - len(to_search),
+        # Счётчики кэша общие для процесса; воркер анализа выполняет
+        # одну задачу за раз, поэтому разница относится к этому прогону
+        "cache_hits": cache_after["hits"] - cache_before["hits"],
+        "cache_misses": cache_after["misses"] - cache_before["misses"],
+        # Фрагменты без результата: ошибка поиска или лимит времени.
+        # Они не входят в знаменатель, поэтому важна доля проверенных
+        "search_failed": search_stats["failed"],
+        "search_unsearched": search_stats["unsearched"],
+        "coverage": (round(total_checked / len(fragments), 4)
+                     if fragments else 1.0),
+    }
+    logger.info(
+        f"[Analysis] Фрагментов: {run_stats['fragments']}, "
+        f"запросов к поиску: {run_stats['search_calls']}, "
+        f"сэкономлено: {run_stats['search_calls_saved']}, "
+        f"не проверено: {run_stats['search_failed']} (ошибка) + "
+        f"{run_stats['search_unsearched']} (время)"
+    )
+    if stats is not None:
+        stats.update(run_stats)
+        stats["timings"] = timer.timings
 
     originality_percent = (
         100.0
@@ -84,39 +255,76 @@ def analyze_text_fragments(text):
     return originality_percent, detailed_matches
 
 
-def analyze_report_logic(report):
+def analysis_config_version():
+    """
+    Хэш настроек, от которых зависят оценки: модель и её режим, нарезка
+    на фрагменты, поисковый бэкенд и порог совпадения.
+    """
+    config = {
+        "version": ANALYSIS_VERSION,
+        "model": MODEL_NAME,
+        "model_mode": settings.AI_MODEL_MODE,
+        "ai_aggregation": settings.AI_AGGREGATION,
+        "ai_chunk_stride": settings.AI_CHUNK_STRIDE,
+        "fragmenter": settings.FRAGMENTER,
+        "search_backend": settings.SEARCH_BACKEND,
+        "search_api_url": settings.SEARCH_API_URL,
+        "search_corpus": settings.SEARCH_FIXTURE_CORPUS,
+        "plagiarism_threshold": PLAGIARISM_THRESHOLD,
+    }
+    payload = json.dumps(config, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def analyze_report_logic(report, progress_callback=None, stats=None):
+    """
+    Полный анализ доклада. В stats (dict) записываются счётчики прогона
+    (см. analyze_text_fragments), число окон модели ai_chunks
+    и длительности этапов timings, включая total.
+    """
+    timer = StageTimer()
+    stats = {} if stats is None else stats
+    start = time.perf_counter()
     text = report.content.strip()
-    originality_percent, detailed_matches = analyze_text_fragments(text)
+    originality_percent, detailed_matches = analyze_text_fragments(
+        text, progress_callback=progress_callback, report_id=report.pk,
+        stats=stats, timer=timer,
+    )
+    if stats["coverage"] < settings.ANALYSIS_MIN_COVERAGE:
+        # Проверенные фрагменты уже сохранены в FragmentResult —
+        # повторный анализ отправит в поиск только оставшиеся
+        raise IncompleteCoverageError(
+            f"Поиск проверил только {stats['coverage']:.0%} фрагментов "
+            f"доклада. Повторите проверку позже."
+        )
 
-    try:
-        ai_score = detect_ai(text)
-        ai_score = float(ai_score) if ai_score is not None else 0.0
-    except Exception:
-        ai_score = 0.0
+    with timer.span("ai_detection"):
+        try:
+            ai_result = detect_ai_detailed(text)
+            ai_score = float(ai_result["score"])
+            stats["ai_chunks"] = len(ai_result["chunks"])
+        except Exception:
+            ai_score = 0.0
 
     report.originality_percent = round(originality_percent, 2)
     report.ai_generated_percent = round(ai_score, 2)
-    report.save()
+    with timer.span("save"):
+        report.save(update_fields=["originality_percent",
+                                   "ai_generated_percent"])
+    timer.timings["total"] = round(time.perf_counter() - start, 4)
+    logger.info(f"[Analysis] Этапы, сек.: {timer.timings}")
 
     return originality_percent, ai_score, detailed_matches
 
 
-def prepare_pdf_certificate(report):
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer)
-
-    font_path = os.path.join(settings.BASE_DIR, "static", "DejaVuSans.ttf")
-    pdfmetrics.registerFont(TTFont("DejaVu", font_path))
-    p.setFont("DejaVu", 14)
+def certificate_font_path():
+    return os.path.join(settings.BASE_DIR, "static", "DejaVuSans.ttf")
 
-    p.drawString(100, 800, "Справка по докладу")
-    p.drawString(100, 760, f"Название: {report.title}")
-    p.drawString(100, 740, f"Автор: "
-                           f"{report.author.full_name}"
-                           f" ({report.author.email})")
-    p.drawString(100, 720, f"Дата: "
-                           f"{report.created_at.strftime('%d.%m.%Y %H:%M')}")
 
+def certificate_lines(report):
+    """
+    Строки справки доклада (автор должен быть подгружен).
+    """
     originality = (
         report.originality_percent
         if report.originality_percent is not None else "–"
@@ -125,11 +333,68 @@ def prepare_pdf_certificate(report):
         report.ai_generated_percent
         if report.ai_generated_percent is not None else "–"
     )
+    return [
+        f"Название: {report.title}",
+        f"Автор: {report.author.full_name} ({report.author.email})",
+        f"Дата: {report.created_at.strftime('%d.%m.%Y %H:%M')}",
+        f"Оригинальность: {originality}%",
+        f"ИИ-генерация: {ai_generated}%",
+    ]
+
+
+def prepare_pdf_certificate(report):
+    return io.BytesIO(render_certificate(certificate_lines(report),
+                                         certificate_font_path()))
+
+
+def certificate_version(report):
+    """
+    Хэш всех полей, которые печатаются в справке: изменение доклада,
+    автора или оценок даёт новую версию.
+    """
+    fields = [
+        report.title,
+        report.author.full_name,
+        report.author.email,
+        report.created_at.isoformat(),
+        report.originality_percent,
+        report.ai_generated_percent,
+    ]
+    payload = json.dumps(fields, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def certificate_is_current(report, version):
+    certificate = report.certificate
+    return bool(certificate and report.certificate_version == version
+                and certificate.storage.exists(certificate.name))
+
+
+def store_certificate(report, version, data):
+    """
+    Сохраняет отрендеренную справку (bytes) как версию version,
+    удаляя файл предыдущей версии.
+    """
+    if report.certificate:
+        report.certificate.delete(save=False)
+    report.certificate.save(
+        f"certificate_report_{report.pk}_{version[:12]}.pdf",
+        ContentFile(data), save=False,
+    )
+    report.certificate_version = version
+    report.certificate_rendered_at = timezone.now()
+    report.save(update_fields=["certificate", "certificate_version",
+                               "certificate_rendered_at"])
+    return report.certificate
 
-    p.drawString(100, 700, f"Оригинальность: {originality}%")
-    p.drawString(100, 680, f"ИИ-генерация: {ai_generated}%")
 
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-    return buffer
+def get_certificate(report):
+    """
+    Возвращает актуальную справку доклада (FieldFile), рендеря её
+    только если версия изменилась или файл пропал из хранилища.
+    """
+    version = certificate_version(report)
+    if certificate_is_current(report, version):
+        return report.certificate
+    buffer = prepare_pdf_certificate(report)
+    return store_certificate(report, version, buffer.getvalue())
@@ -1,39 +1,123 @@
 # articles/views.py
+import hmac
+import os
+
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.http import HttpResponse
+from django.http import (FileResponse, HttpResponse, HttpResponseForbidden,
+                         JsonResponse)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django.views import View
 from django.views.generic import DeleteView, DetailView, TemplateView
-from rest_framework import viewsets
-
-from .forms import ReportForm
-from .models import PlagiarismCheck, Report
-from .serializers import PlagiarismCheckSerializer, ReportSerializer
-from .use_cases import (analyze_report_logic, extract_text_from_pdf,
-                        prepare_pdf_certificate)
+from rest_framework import serializers, viewsets
+from rest_framework.decorators import action
+
+from .certificate_export import certificates_zip_response
+from .decorators import cache_stats
+from .forms import ReportFilterForm, ReportForm
+from .fulltext import search_reports
+from .jobs import enqueue_analysis
+from .metrics import render_metrics
+from .models import AnalysisJob, PlagiarismCheck, Report
+from .pagination import (CheckCursorPagination, ReportCursorPagination,
+                         SearchPagination, keyset_page)
+from .pdf_extraction import extract_pdf_cached, pdf_cache_stats
+from .serializers import (PlagiarismCheckSerializer, ReportListSerializer,
+                          ReportSearchSerializer, ReportSerializer)
+from .use_cases import certificate_version, get_certificate
+
+
+def fill_content_from_pdf(request, report):
+    result, report.file_sha256 = extract_pdf_cached(report.file)
+    if result.text:
+        report.content = result.text
+    else:
+        messages.warning(request, "Не удалось извлечь текст из PDF.")
+
+    page_errors = [page for page, _ in result.errors if page is not None]
+    if page_errors and result.text:
+        messages.warning(
+            request,
+            f"Не удалось прочитать страницы PDF: "
+            f"{', '.join(map(str, page_errors[:10]))}"
+            f"{'…' if len(page_errors) > 10 else ''}",
+        )
+    if result.truncated:
+        messages.warning(
+            request,
+            f"PDF слишком большой: извлечено {result.pages_extracted} "
+            f"из {result.page_count} страниц.",
+        )
 
 
 class ReportViewSet(viewsets.ModelViewSet):
-    queryset = Report.objects.all()
+    """
+    Список — без текста доклада, с курсорной пагинацией и фильтрами
+    ReportFilterForm (?author=&status=&date_from=&date_to=).
+    """
+
+    queryset = Report.objects.select_related("author")
     serializer_class = ReportSerializer
+    pagination_class = ReportCursorPagination
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return ReportListSerializer
+        if self.action == "search":
+            return ReportSearchSerializer
+        return ReportSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ("list", "search"):
+            return queryset
+        form = ReportFilterForm(self.request.query_params)
+        if not form.is_valid():
+            raise serializers.ValidationError(form.errors)
+        return form.filter(queryset.defer("content"))
+
+    @action(detail=False, pagination_class=SearchPagination)
+    def search(self, request):
+        """
+        Полнотекстовый поиск по названию и тексту: ?q=, результаты
+        по убыванию релевантности rank, фильтры — как у списка.
+        """
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            raise serializers.ValidationError({"q": ["Пустой запрос."]})
+        queryset = search_reports(self.get_queryset(), text)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 class PlagiarismCheckViewSet(viewsets.ModelViewSet):
     queryset = PlagiarismCheck.objects.all()
     serializer_class = PlagiarismCheckSerializer
+    pagination_class = CheckCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        report_id = self.request.query_params.get("report")
+        if self.action == "list" and report_id:
+            if not report_id.isdigit():
+                raise serializers.ValidationError(
+                    {"report": ["Ожидается id доклада."]}
+                )
+            queryset = queryset.filter(report_id=report_id)
+        return queryset
 
 
 class RegisterReportPageView(LoginRequiredMixin, View):
     template_name = "register_report.html"
 
     def get(self, request):
-        reports = (Report.objects.filter(author=request.user).
-                   order_by("-created_at"))
-        form = ReportForm()
-        return render(request, self.template_name,
-                      {"reports": reports, "form": form})
+        return render(request, self.template_name, {"form": ReportForm()})
 
     def post(self, request):
         form = ReportForm(request.POST, request.FILES)
@@ -42,12 +126,7 @@ class RegisterReportPageView(LoginRequiredMixin, View):
             report.author = request.user
 
             if not report.content and report.file:
-                extracted_text = extract_text_from_pdf(report.file)
-                if extracted_text:
-                    report.content = extracted_text
-                else:
-                    messages.warning(request,
-                                     "Не удалось извлечь текст из PDF.")
+                fill_content_from_pdf(request, report)
 
             if not report.content:
                 messages.error(
@@ -55,23 +134,14 @@ class RegisterReportPageView(LoginRequiredMixin, View):
                     "Доклад не может быть пустым."
                     " Введите текст или загрузите PDF.",
                 )
-                reports = Report.objects.filter(author=request.user).order_by(
-                    "-created_at"
-                )
-                return render(
-                    request, self.template_name,
-                    {"reports": reports, "form": form}
-                )
+                return render(request, self.template_name, {"form": form})
 
             report.save()
             messages.success(request, "Доклад успешно зарегистрирован!")
             return redirect("register_report")
 
         messages.error(request, "Пожалуйста, исправьте ошибки в форме.")
-        reports = (Report.objects.filter(author=request.user).
-                   order_by("-created_at"))
-        return render(request, self.template_name,
-                      {"reports": reports, "form": form})
+        return render(request, self.template_name, {"form": form})
 
 
 class EditReportView(LoginRequiredMixin, View):
@@ -91,12 +161,7 @@ class EditReportView(LoginRequiredMixin, View):
             report = form.save(commit=False)
 
             if not report.content and report.file:
-                extracted_text = extract_text_from_pdf(report.file)
-                if extracted_text:
-                    report.content = extracted_text
-                else:
-                    messages.warning(request,
-                                     "Не удалось извлечь текст из PDF.")
+                fill_content_from_pdf(request, report)
 
             if not report.content:
                 messages.error(
@@ -129,17 +194,22 @@ class GetReferenceListView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        user = self.request.user
-        context["reports"] = (
-            Report.objects.filter(author=user).order_by("-created_at")
-            if user.is_authenticated
-            else []
+        reports = (Report.objects.filter(author=self.request.user)
+                   .select_related("author").defer("content"))
+        context["reports"], context["next_cursor"] = keyset_page(
+            reports, self.request.GET.get("after")
         )
         return context
 
 
 class GetReferenceView(TemplateView):
+    """
+    Страница доклада с совпадениями последней проверки. Совпадения
+    читаются постранично по (проверка, позиция): ?after=<позиция>.
+    """
+
     template_name = "get-reference.html"
+    matches_page_size = 50
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -147,11 +217,25 @@ class GetReferenceView(TemplateView):
         report = get_object_or_404(Report, id=report_id)
         context["report"] = report
 
-        plagiarism_details = (self.request.session.pop
-                              ("plagiarism_details", None))
-        context["plagiarism_details"] = plagiarism_details\
-            if plagiarism_details else []
-
+        job = AnalysisJob.objects.filter(report=report).first()
+        context["job"] = job
+
+        check = (PlagiarismCheck.objects.filter(report=report)
+                 .order_by("-checked_at", "-id").first())
+        matches, next_after = [], None
+        if check is not None:
+            matches = check.matches.all()
+            after = self.request.GET.get("after", "")
+            if after.isdigit():
+                matches = matches.filter(position__gt=int(after))
+            matches = list(matches[: self.matches_page_size + 1])
+            if len(matches) > self.matches_page_size:
+                matches = matches[: self.matches_page_size]
+                next_after = matches[-1].position
+        context["check"] = check
+        context["plagiarism_details"] = matches
+        context["highlight_fragments"] = [m.fragment for m in matches]
+        context["next_after"] = next_after
         return context
 
 
@@ -176,23 +260,110 @@ def analyze_report(request, report_id):
         messages.error(request, "Текст доклада пустой.")
         return redirect("get_reference", report_id=report.id)
 
-    originality_percent, ai_score, details = analyze_report_logic(report)
-
-    request.session["plagiarism_details"] = details
-    messages.success(
-        request,
-        f"Проверка завершена. Оригинальность:"
-        f"{originality_percent:.2f}%, ИИ: {ai_score:.2f}%",
-    )
+    # ?force=1 — полный анализ, даже если такой текст уже проверялся
+    job = enqueue_analysis(report, force=request.GET.get("force") == "1")
+    if job.status == "done":
+        messages.info(request, "Этот текст уже проверялся — показан "
+                               "сохранённый результат.")
+    else:
+        messages.info(request, "Доклад поставлен в очередь на проверку.")
     return redirect("get_reference", report_id=report.id)
 
 
-def generate_certificate(request, report_id):
+def analysis_job_status(request, report_id):
     report = get_object_or_404(Report, id=report_id)
-    buffer = prepare_pdf_certificate(report)
+    job = AnalysisJob.objects.filter(report=report).first()
+
+    if job is None:
+        return JsonResponse({"status": None, "progress": 0})
+
+    return JsonResponse(
+        {
+            "job_id": job.id,
+            "status": job.status,
+            "progress": job.progress,
+            "error": job.error,
+            "stats": job.stats,
+            "originality_percent": report.originality_percent,
+            "ai_generated_percent": report.ai_generated_percent,
+        }
+    )
+
 
-    response = HttpResponse(buffer, content_type="application/pdf")
-    response["Content-Disposition"] = (
-        f'attachment; filename="certificate_report_{report.id}.pdf"'
+@staff_member_required
+def cache_stats_view(request):
+    """
+    Счётчики кэшей текущего процесса. Поиск выполняют воркеры анализа —
+    их счётчики пишутся в лог после каждой задачи.
+    """
+    return JsonResponse(
+        {
+            "pid": os.getpid(),
+            "search_cache": cache_stats.as_dict(),
+            "pdf_cache": pdf_cache_stats.as_dict(),
+        }
+    )
+
+
+@staff_member_required
+def export_certificates(request):
+    """
+    ZIP со справками докладов, отобранных фильтром ReportFilterForm
+    (?author=&status=&date_from=&date_to=). Архив отдаётся потоком.
+    """
+    form = ReportFilterForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    return certificates_zip_response(form.filter(Report.objects.all()))
+
+
+def metrics_view(request):
+    """
+    Метрики в формате Prometheus. Скрейпер передаёт METRICS_TOKEN
+    в заголовке Authorization; без настроенного токена — только персонал.
+    """
+    token = settings.METRICS_TOKEN
+    auth = request.headers.get("Authorization", "")
+    if token:
+        allowed = hmac.compare_digest(auth, f"Bearer {token}")
+    else:
+        allowed = request.user.is_active and request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(),
+                        content_type="text/plain; version=0.0.4")
+
+
+def generate_certificate(request, report_id):
+    """
+    Отдаёт готовую справку из хранилища. ETag — версия справки, поэтому
+    повторное скачивание без изменений доклада получает 304 без рендеринга
+    и чтения файла.
+    """
+    report = get_object_or_404(Report.objects.select_related("author"),
+                               id=report_id)
+    version = certificate_version(report)
+    etag = f'"{version}"'
+    last_modified = None
+    if (report.certificate_version == version
+            and report.certificate_rendered_at is not None):
+        last_modified = int(report.certificate_rendered_at.timestamp())
+    not_modified = get_conditional_response(request, etag=etag,
+                                            last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    certificate = get_certificate(report)
+    response = FileResponse(
+        certificate.open("rb"),
+        as_attachment=True,
+        filename=f"certificate_report_{report.id}.pdf",
+        content_type="application/pdf",
+    )
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(
+        report.certificate_rendered_at.timestamp()
     )
+    # Браузер хранит справку, но перед использованием сверяет ETag
+    patch_cache_control(response, private=True, no_cache=True)
     return response
@@ -0,0 +1,60 @@
+# benchmarks/bench_similarity.py
+"""
+Сравнение старого (TfidfVectorizer на каждую пару) и пакетного подсчёта
+схожести фрагментов со сниппетами.
+
+Запуск: python -m benchmarks.bench_similarity [--fragments 150]
+"""
+import argparse
+import random
+import time
+
+from articles.similarity import (batch_similarity_percent,
+                                 pairwise_similarity_percent)
+
+WORDS = (
+    "plagiarism detection analysis report fragment search similarity "
+    "student article research method result data model network text "
+    "university science theory experiment sample value test system"
+).split()
+
+
+def make_pairs(n_fragments, snippets_per_fragment, seed=42):
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(n_fragments):
+        fragment = " ".join(rng.choices(WORDS, k=25))
+        for _ in range(snippets_per_fragment):
+            pairs.append((fragment, " ".join(rng.choices(WORDS, k=30))))
+    return pairs
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fragments", type=int, default=150)
+    parser.add_argument("--snippets", type=int, default=5)
+    args = parser.parse_args()
+
+    pairs = make_pairs(args.fragments, args.snippets)
+
+    pairwise, pairwise_time = timed(
+        lambda: [pairwise_similarity_percent(f, s) for f, s in pairs]
+    )
+    batch, batch_time = timed(batch_similarity_percent, pairs)
+
+    mismatches = sum(1 for x, y in zip(pairwise, batch) if x != y)
+    print(f"Пар: {len(pairs)}")
+    print(f"По парам:  {pairwise_time * 1000:9.1f} мс")
+    print(f"Пакетно:   {batch_time * 1000:9.1f} мс "
+          f"(x{pairwise_time / batch_time:.1f})")
+    print(f"Расхождений: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
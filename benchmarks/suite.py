@@ -0,0 +1,217 @@
+# benchmarks/suite.py
+"""
+Микробенчмарки горячих путей анализа: извлечение текста PDF, проверка
+фрагментов (с поиском по локальному корпусу вместо Google), detect_ai,
+генерация справки и SQLite-кэш поиска.
+
+Результаты — медиана, минимум и p95 времени одного вызова — сохраняются
+в JSON и сравниваются с сохранённым эталоном. Запуск:
+python manage.py run_benchmarks (см. --help).
+"""
+import platform
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import fitz
+from django.utils import timezone
+
+from articles import cache_utils
+from articles.search_stub import SearchCorpus
+
+WORDS = (
+    "анализ доклада фрагмент поиск источник метод результат данные модель "
+    "сеть текст университет наука теория эксперимент выборка значение "
+    "система plagiarism detection research article student method result "
+    "network science theory experiment sample value test system"
+).split()
+
+PDF_SIZES = {"small": 5, "medium": 50, "huge": 500}
+TEXT_LENGTHS = (100, 1000, 5000)  # слов
+CACHE_SIZES = (1_000, 100_000)  # записей
+
+
+def random_text(words, seed=0):
+    rng = random.Random(seed)
+    return " ".join(rng.choices(WORDS, k=words))
+
+
+def make_pdf(pages, words_per_page=300):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(page.rect + (36, 36, -36, -36),
+                            random_text(words_per_page, seed=i),
+                            fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def measure(func, repeat, warmup=1):
+    """
+    Вызывает func warmup + repeat раз; возвращает статистику
+    по последним repeat вызовам в секундах.
+    """
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": timings[0],
+        "p95_s": timings[int(0.95 * (len(timings) - 1))],
+        "repeat": repeat,
+    }
+
+
+def bench_pdf(repeat):
+    from django.core.files.uploadedfile import TemporaryUploadedFile
+
+    from articles.use_cases import extract_text_from_pdf
+
+    for name, pages in PDF_SIZES.items():
+        data = make_pdf(pages)
+        # Крупные загрузки Django держит во временном файле; только
+        # с путём на диске включается параллельное извлечение по страницам
+        upload = TemporaryUploadedFile(f"bench_{name}.pdf", "application/pdf",
+                                       len(data), None)
+        upload.write(data)
+        upload.flush()
+        try:
+            yield (f"pdf_extract_{name}",
+                   lambda upload=upload: extract_text_from_pdf(upload),
+                   max(1, repeat // (pages // 5 or 1)))
+        finally:
+            upload.close()
+
+
+def bench_analysis(repeat):
+    from articles.use_cases import analyze_text_fragments
+
+    corpus = SearchCorpus.load()
+    # Текст наполовину состоит из документов корпуса, чтобы часть
+    # фрагментов находила совпадения
+    borrowed = " ".join(doc["text"] for doc in corpus.documents)
+    text = borrowed + " " + random_text(len(borrowed.split()))
+
+    def run():
+        with patch("articles.use_cases.search_fragment", corpus.search), \
+                patch("articles.use_cases.find_local_matches",
+                      return_value={}):
+            analyze_text_fragments(text)
+
+    yield "analyze_text_fragments", run, repeat
+
+
+def bench_detect_ai(repeat):
+    from articles.ai_detection import detect_ai, warmup
+
+    warmup()  # загрузка модели не входит в замер
+    for words in TEXT_LENGTHS:
+        text = random_text(words, seed=words)
+        yield (f"detect_ai_{words}_words",
+               lambda text=text: detect_ai(text), repeat)
+
+
+def bench_certificate(repeat):
+    from articles.use_cases import prepare_pdf_certificate
+
+    report = SimpleNamespace(
+        title="Бенчмарк справки",
+        author=SimpleNamespace(full_name="Автор Бенчмарка",
+                               email="bench@example.com"),
+        created_at=timezone.now(),
+        originality_percent=87.5,
+        ai_generated_percent=12.3,
+    )
+    yield ("prepare_pdf_certificate",
+           lambda: prepare_pdf_certificate(report), repeat)
+
+
+def bench_cache(repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        yield from _bench_cache(Path(tmp), repeat)
+
+
+def _bench_cache(tmp, repeat):
+    for size in CACHE_SIZES:
+        db = tmp / f"bench_cache_{size}.sqlite3"
+        with patch.object(cache_utils, "CACHE_DB", str(db)):
+            conn = cache_utils.get_connection()
+            results = '[{"title": "T", "url": "http://example.com", ' \
+                      '"snippet": "' + random_text(30) + '"}]'
+            now = time.time()
+            with conn:
+                conn.execute("BEGIN")
+                conn.executemany(
+                    "INSERT INTO search_cache (query, results, created_at) "
+                    "VALUES (?, ?, ?)",
+                    ((f"query {i}", results, now) for i in range(size)),
+                )
+        rng = random.Random(size)
+        counter = iter(range(10 ** 9))
+
+        def get(db=db, rng=rng, size=size):
+            with patch.object(cache_utils, "CACHE_DB", str(db)):
+                cache_utils.get_cached_result(f"query {rng.randrange(size)}")
+
+        def set_(db=db, counter=counter):
+            with patch.object(cache_utils, "CACHE_DB", str(db)):
+                cache_utils.set_cached_result(f"new {next(counter)}",
+                                              [{"snippet": "s"}])
+
+        yield f"cache_get_{size}", get, repeat * 20
+        yield f"cache_set_{size}", set_, repeat * 20
+
+
+GROUPS = {
+    "pdf": bench_pdf,
+    "analysis": bench_analysis,
+    "detect_ai": bench_detect_ai,
+    "certificate": bench_certificate,
+    "cache": bench_cache,
+}
+
+
+def run_suite(groups=None, repeat=5, log=print):
+    results = {}
+    for group in groups or GROUPS:
+        for name, func, case_repeat in GROUPS[group](repeat):
+            results[name] = measure(func, case_repeat)
+            log(f"{name:<32} {results[name]['median_s'] * 1000:10.2f} мс")
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "node": platform.node(),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """
+    Сравнивает медианы с эталоном. Возвращает список
+    (имя, эталон, сейчас, изменение, регрессия?) для общих случаев;
+    регрессия — медиана выросла больше чем в 1 + threshold раз.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        change = result["median_s"] / base["median_s"] - 1
+        rows.append((name, base["median_s"], result["median_s"], change,
+                     change > threshold))
+    return rows
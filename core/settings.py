@@ -77,6 +77,96 @@ WSGI_APPLICATION = "core.wsgi.application"
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
 GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID", "")
 
+# SQLite-кэш внешнего поиска (общий для всех процессов, поэтому путь
+# не зависит от рабочего каталога) и его максимальный размер
+SEARCH_CACHE_DB = BASE_DIR / os.getenv("SEARCH_CACHE_DB",
+                                       "google_search_cache.sqlite3")
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES",
+                                         "100000"))
+
+# Очередь анализа: задача без признаков жизни воркера дольше
+# ANALYSIS_JOB_STALE_SECONDS возвращается в очередь, не более
+# ANALYSIS_JOB_MAX_ATTEMPTS раз
+ANALYSIS_JOB_STALE_SECONDS = int(os.getenv("ANALYSIS_JOB_STALE_SECONDS",
+                                           "900"))
+ANALYSIS_JOB_MAX_ATTEMPTS = int(os.getenv("ANALYSIS_JOB_MAX_ATTEMPTS", "3"))
+# Как часто воркер отмечает heartbeat_at выполняемой задачи, сек.
+ANALYSIS_JOB_HEARTBEAT_SECONDS = float(
+    os.getenv("ANALYSIS_JOB_HEARTBEAT_SECONDS", "30")
+)
+# Минимальная доля фрагментов с результатом поиска: при меньшей
+# проверка завершается ошибкой, а не завышает оригинальность
+ANALYSIS_MIN_COVERAGE = float(os.getenv("ANALYSIS_MIN_COVERAGE", "0.95"))
+
+# Токен для /metrics (заголовок Authorization: Bearer <токен>);
+# без токена метрики доступны только персоналу
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Процессы рендеринга справок при выгрузке архивом
+CERTIFICATE_EXPORT_WORKERS = int(os.getenv("CERTIFICATE_EXPORT_WORKERS",
+                                           "4"))
+
+# Поисковый бэкенд: GoogleSearchBackend или FixtureSearchBackend (поиск
+# по локальному корпусу без сети). SEARCH_API_URL переопределяет адрес
+# Google API, например для локального run_search_stub
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND",
+                           "articles.external_search.GoogleSearchBackend")
+SEARCH_API_URL = os.getenv("SEARCH_API_URL", "")
+SEARCH_FIXTURE_CORPUS = os.getenv("SEARCH_FIXTURE_CORPUS", "")
+
+# Параллельный поиск фрагментов
+SEARCH_MAX_WORKERS = int(os.getenv("SEARCH_MAX_WORKERS", "8"))
+# К лимиту на поиск доклада добавляется число фрагментов / SEARCH_QPS
+SEARCH_DEADLINE_SECONDS = float(os.getenv("SEARCH_DEADLINE_SECONDS", "120"))
+SEARCH_REQUEST_TIMEOUT = float(os.getenv("SEARCH_REQUEST_TIMEOUT", "10"))
+SEARCH_RETRIES = int(os.getenv("SEARCH_RETRIES", "2"))
+# Общий для всех процессов лимит запросов к Google: скорость (0 — без
+# ограничения) и дневная квота (0 — без квоты); квота Google
+# сбрасывается в полночь по тихоокеанскому времени
+SEARCH_QPS = float(os.getenv("SEARCH_QPS", "5"))
+SEARCH_DAILY_QUOTA = int(os.getenv("SEARCH_DAILY_QUOTA", "10000"))
+SEARCH_QUOTA_TIMEZONE = os.getenv("SEARCH_QUOTA_TIMEZONE",
+                                  "America/Los_Angeles")
+# Экспоненциальная задержка между повторами при 429/5xx, сек.
+SEARCH_BACKOFF_BASE = float(os.getenv("SEARCH_BACKOFF_BASE", "0.5"))
+SEARCH_BACKOFF_MAX = float(os.getenv("SEARCH_BACKOFF_MAX", "30"))
+
+# Нарезка текста на фрагменты для поиска (см. articles/fragmenters.py):
+# strategy — window или sentence; max_noise_ratio — отбрасывать фрагменты,
+# где доля стоп-слов и чисел выше порога; max_queries — бюджет запросов
+FRAGMENTER = {
+    "strategy": os.getenv("FRAGMENTER_STRATEGY", "window"),
+    "size": int(os.getenv("FRAGMENTER_SIZE", "25")),
+    "step": int(os.getenv("FRAGMENTER_STEP", "20")),
+    "max_noise_ratio": (float(os.getenv("FRAGMENTER_MAX_NOISE_RATIO"))
+                        if os.getenv("FRAGMENTER_MAX_NOISE_RATIO") else None),
+    "dedupe": os.getenv("FRAGMENTER_DEDUPE", "False") == "True",
+    "max_queries": (int(os.getenv("FRAGMENTER_MAX_QUERIES"))
+                    if os.getenv("FRAGMENTER_MAX_QUERIES") else None),
+}
+
+# Извлечение текста из PDF: лимиты и параллельная обработка больших файлов
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "1000"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "2000000"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "50"))
+# Загрузки хэшируются по мере приёма (кэш текста PDF по SHA-256)
+FILE_UPLOAD_HANDLERS = [
+    "articles.uploads.Sha256MemoryFileUploadHandler",
+    "articles.uploads.Sha256TemporaryFileUploadHandler",
+]
+
+# fp32 или int8 (динамическая квантизация для CPU), см. benchmark_ai_model
+AI_MODEL_MODE = os.getenv("AI_MODEL_MODE", "fp32")
+# Длинные тексты режутся на окна по 512 токенов с перекрытием AI_CHUNK_STRIDE
+AI_CHUNK_STRIDE = int(os.getenv("AI_CHUNK_STRIDE", "64"))
+AI_BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "8"))
+# Сервер микропакетов: сколько ждать добора пакета и глубина очереди
+AI_SERVER_MAX_WAIT_MS = float(os.getenv("AI_SERVER_MAX_WAIT_MS", "5"))
+AI_SERVER_QUEUE_SIZE = int(os.getenv("AI_SERVER_QUEUE_SIZE", "256"))
+AI_TORCH_THREADS = int(os.getenv("AI_TORCH_THREADS", "0"))  # 0 — по умолчанию
+AI_AGGREGATION = os.getenv("AI_AGGREGATION", "mean")  # mean, weighted, max
+
 # База данных: PostgreSQL из .env
 DATABASES = {
     "default": {
@@ -22,10 +22,13 @@ from django.contrib import admin
 from django.urls import include, path
 from django.views.generic import TemplateView
 
+from articles.views import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("users/", include("users.urls")),
     path("articles/", include("articles.urls")),  # подключено!
+    path("metrics", metrics_view, name="metrics"),
     path("", TemplateView.as_view(template_name="index.html"), name="home"),
     path("home", TemplateView.as_view(template_name="index.html"),
          name="home"),
@@ -7,6 +7,7 @@ from django.views.decorators.http import require_POST
 from django.views.generic import View
 
 from articles.models import Report
+from articles.pagination import keyset_page
 
 from .serializers import UserSerializer
 
@@ -31,9 +32,12 @@ class LogoutView(View):
 @method_decorator(login_required, name="dispatch")
 class ProfileView(View):
     def get(self, request):
-        reports = (Report.objects.filter(author=request.user).order_by
-                   ("-created_at"))
-        return render(request, "profile.html", {"reports": reports})
+        reports, next_cursor = keyset_page(
+            Report.objects.filter(author=request.user).defer("content"),
+            request.GET.get("after"),
+        )
+        return render(request, "profile.html",
+                      {"reports": reports, "next_cursor": next_cursor})
 
 
 class AuthFormView(View):